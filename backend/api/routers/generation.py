@@ -1,11 +1,25 @@
+import json
+import math
 from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
 from typing import List
-from backend.services.rag_service import generate_test_cases, generate_selenium_script
-from backend.api.schemas.generation import TestCaseRequest, TestCase, ScriptRequest, ScriptResponse
+from backend.services.rag_service import (
+    generate_test_cases, stream_test_cases, generate_selenium_script, generate_selenium_scripts
+)
+from backend.services.semantic_cache import semantic_cache
+from backend.services.llm_gateway import llm_gateway, LLMGatewayError
+from backend.api.schemas.generation import (
+    TestCaseRequest, TestCase, ScriptRequest, ScriptResponse, ScriptBatchRequest, ScriptBatchResult
+)
 from backend.core.logging import logger
 
 router = APIRouter()
 
+def gateway_http_error(e: LLMGatewayError) -> HTTPException:
+    # Provider rate limits surface as 429, outages as 503, instead of a 500
+    headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+    return HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
 @router.post("/test-cases", response_model=List[TestCase])
 async def create_test_cases(
     request: TestCaseRequest,
@@ -14,10 +28,44 @@ async def create_test_cases(
     try:
         test_cases = await generate_test_cases(request.query, x_session_id)
         return test_cases
+    except LLMGatewayError as e:
+        logger.error(f"LLM unavailable for test cases: {str(e)}")
+        raise gateway_http_error(e)
     except Exception as e:
         logger.error(f"Failed to generate test cases: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/test-cases/stream")
+async def stream_test_case_events(
+    request: TestCaseRequest,
+    x_session_id: str = Header(..., alias="X-Session-ID")
+):
+    # Server-sent events: one "test_case" event per case, then "done" or "error"
+    async def events():
+        count = 0
+        try:
+            async for test_case in stream_test_cases(request.query, x_session_id):
+                try:
+                    validated = TestCase(**test_case)
+                except Exception as e:
+                    logger.warning(f"Skipping malformed test case {test_case}: {e.__class__.__name__}")
+                    continue
+                count += 1
+                yield f"event: test_case\ndata: {validated.model_dump_json()}\n\n"
+            yield f"event: done\ndata: {json.dumps({'count': count})}\n\n"
+        except LLMGatewayError as e:
+            logger.error(f"LLM unavailable for test case stream: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e), 'status_code': e.status_code})}\n\n"
+        except Exception as e:
+            logger.error(f"Failed to stream test cases: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/script", response_model=ScriptResponse)
 async def create_script(
     request: ScriptRequest,
@@ -29,6 +77,35 @@ async def create_script(
             script=script,
             test_id=request.test_case.get("test_id", "unknown")
         )
+    except LLMGatewayError as e:
+        logger.error(f"LLM unavailable for script: {str(e)}")
+        raise gateway_http_error(e)
     except Exception as e:
         logger.error(f"Failed to generate script: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/scripts")
+async def create_scripts(
+    request: ScriptBatchRequest,
+    x_session_id: str = Header(..., alias="X-Session-ID")
+):
+    # One NDJSON line per script, in completion order
+    async def stream_scripts():
+        async for test_case, script, error in generate_selenium_scripts(request.test_cases, x_session_id):
+            test_id = test_case.get("test_id", "unknown")
+            if error:
+                logger.error(f"Failed to generate script for {test_id}: {error}")
+                result = ScriptBatchResult(test_id=test_id, status="error", message=error)
+            else:
+                result = ScriptBatchResult(test_id=test_id, status="success", script=script)
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(stream_scripts(), media_type="application/x-ndjson")
+
+@router.get("/cache/stats")
+async def semantic_cache_stats():
+    return semantic_cache.stats()
+
+@router.get("/llm/stats")
+async def llm_gateway_stats():
+    return llm_gateway.stats()
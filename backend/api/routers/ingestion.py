@@ -1,10 +1,19 @@
+import asyncio
 from fastapi import APIRouter, UploadFile, File, HTTPException, Header
 from typing import List
 from backend.services.ingestion_service import process_file
+from backend.services.embedding_service import embeddings
+from backend.services.embedding_cache import CachedEmbeddings
 from backend.api.schemas.ingestion import IngestResponse
+from backend.core.config import get_settings
 from backend.core.logging import logger
 
 router = APIRouter()
+settings = get_settings()
+
+# Shared by every upload request, so INGESTION_CONCURRENCY bounds the files
+# being ingested process-wide rather than per request
+ingestion_slots = asyncio.Semaphore(settings.INGESTION_CONCURRENCY)
 
 @router.post("/upload", response_model=List[IngestResponse])
 async def upload_documents(
@@ -12,22 +21,32 @@ async def upload_documents(
     x_session_id: str = Header(..., alias="X-Session-ID")
 ):
     logger.info(f"Received upload request for session: {x_session_id}")
-    results = []
-    for file in files:
-        try:
-            chunks_count = await process_file(file, x_session_id)
-            results.append(IngestResponse(
-                filename=file.filename,
-                status="success",
-                chunks_count=chunks_count,
-                message="Successfully ingested"
-            ))
-        except Exception as e:
-            logger.error(f"Failed to ingest {file.filename}: {str(e)}")
-            results.append(IngestResponse(
-                filename=file.filename,
-                status="error",
-                chunks_count=0,
-                message=str(e)
-            ))
-    return results
+
+    async def ingest(file: UploadFile) -> IngestResponse:
+        async with ingestion_slots:
+            try:
+                chunks_count = await process_file(file, x_session_id)
+                return IngestResponse(
+                    filename=file.filename,
+                    status="success",
+                    chunks_count=chunks_count,
+                    message="Successfully ingested"
+                )
+            except Exception as e:
+                logger.error(f"Failed to ingest {file.filename}: {str(e)}")
+                return IngestResponse(
+                    filename=file.filename,
+                    status="error",
+                    chunks_count=0,
+                    message=str(e)
+                )
+
+    # gather keeps the response in upload order
+    results = await asyncio.gather(*(ingest(file) for file in files))
+    return list(results)
+
+@router.get("/embedding-cache/stats")
+async def embedding_cache_stats():
+    if not isinstance(embeddings, CachedEmbeddings):
+        raise HTTPException(status_code=404, detail="Embedding cache is disabled")
+    return embeddings.stats()
@@ -1,7 +1,6 @@
-import os
-import shutil
 from fastapi import APIRouter, HTTPException, Header
-from backend.services.ingestion_service import get_vector_store
+from backend.services.session_context import session_contexts
+from backend.services.session_manager import cleanup_session as cleanup_session_resources, session_registry
 from backend.core.logging import logger
 
 router = APIRouter()
@@ -10,24 +9,17 @@ router = APIRouter()
 async def cleanup_session(x_session_id: str = Header(..., alias="X-Session-ID")):
     logger.info(f"Cleaning up session: {x_session_id}")
     try:
-        # 1. Drop Milvus Collection
-        collection_name = f"session_{x_session_id}"
-        vector_store = get_vector_store(collection_name=collection_name)
-        
-        if vector_store.col:
-            vector_store.col.drop()
-            logger.info(f"Dropped collection: {collection_name}")
-        else:
-            logger.warning(f"Collection {collection_name} not found or already dropped")
-            
-        # 2. Delete Session Files
-        session_dir = os.path.join("backend", "sessions", x_session_id)
-        if os.path.exists(session_dir):
-            shutil.rmtree(session_dir)
-            logger.info(f"Deleted session directory: {session_dir}")
-            
+        await cleanup_session_resources(x_session_id)
         return {"status": "success", "message": f"Session {x_session_id} cleaned up"}
             
     except Exception as e:
         logger.error(f"Failed to cleanup session {x_session_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/contexts/stats")
+async def session_context_stats():
+    return session_contexts.stats()
+
+@router.get("/stats")
+async def session_stats():
+    return session_registry.stats()
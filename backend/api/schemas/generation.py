@@ -18,3 +18,12 @@ class ScriptRequest(BaseModel):
 class ScriptResponse(BaseModel):
     script: str
     test_id: str
+
+class ScriptBatchRequest(BaseModel):
+    test_cases: List[Dict[str, Any]]
+
+class ScriptBatchResult(BaseModel):
+    test_id: str
+    status: str
+    script: Optional[str] = None
+    message: Optional[str] = None
@@ -8,9 +8,92 @@ class Settings(BaseSettings):
     
     # LLM & Vector DB
     GROQ_API_KEY: str
-    MILVUS_URI: str
-    MILVUS_TOKEN: str
+    MILVUS_URI: str = ""
+    MILVUS_TOKEN: str = ""
+
+    # Vector store: "milvus" or the in-process "numpy" index
+    VECTOR_BACKEND: str = "milvus"
+    NUMPY_INDEX_HNSW: bool = False
+    NUMPY_INDEX_FLUSH_SECONDS: float = 1.0
+    VECTOR_STORE_CACHE_SIZE: int = 64
+    VECTOR_STORE_CACHE_TTL_SECONDS: int = 900
+    # "collection" (one per session) or "shared" (one collection, partitioned by session_id)
+    VECTOR_STORAGE_MODE: str = "collection"
+    SHARED_COLLECTION_NAME: str = "qa_agent_sessions"
+    MILVUS_NUM_PARTITIONS: int = 64
+    # Threads for blocking vector store / filesystem calls made from async handlers
+    BLOCKING_IO_THREADS: int = 32
+
+    # Embeddings
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    # "huggingface" (sentence-transformers/PyTorch) or "onnx" (int8 ONNX Runtime)
+    EMBEDDING_BACKEND: str = "huggingface"
+    ONNX_MODEL_DIR: str = "backend/models/all-MiniLM-L6-v2-onnx-int8"
+    ONNX_NUM_THREADS: int = 0
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    WARMUP_ON_STARTUP: bool = True
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "backend/cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200_000
+
+    # Ingestion
+    # Files ingested at once across all uploads; parse/split run on threads
+    INGESTION_CONCURRENCY: int = 4
+    INGESTION_BATCH_SIZE: int = 64
+    INGESTION_INFLIGHT_BATCHES: int = 2
+    # Large PDFs are extracted in page ranges across worker processes (0 = one per CPU)
+    PDF_EXTRACTION_WORKERS: int = 0
+    PDF_PAGES_PER_SHARD: int = 8
+    PDF_PARALLEL_MIN_PAGES: int = 32
+
+    # Retrieval: BM25 + vector search fused with reciprocal rank fusion
+    HYBRID_RETRIEVAL_ENABLED: bool = True
+    RETRIEVAL_CANDIDATES: int = 10
+    RRF_K: int = 60
+    TEST_CASE_RETRIEVAL_K: int = 4
+    SCRIPT_RETRIEVAL_K: int = 2
+
+    # Context packing: token budgets per prompt section
+    CONTEXT_TOKENIZER: str = "o200k_base"
+    TEST_CASE_CONTEXT_TOKENS: int = 1500
+    HTML_CONTEXT_TOKENS: int = 2000
+    DOC_CONTEXT_TOKENS: int = 800
+    CONTEXT_MAX_OVERLAP_CHARS: int = 400
+    CONTEXT_DUPLICATE_THRESHOLD: float = 0.85
+    CONTEXT_MMR_LAMBDA: float = 0.7
+
+    # Generation
+    SCRIPT_GENERATION_CONCURRENCY: int = 4
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 64
+    SESSION_CONTEXT_MAX_BYTES: int = 64 * 1024 * 1024
     
+    # Sessions: idle expiry, quotas and the background reaper
+    SESSION_TTL_SECONDS: int = 2 * 60 * 60
+    SESSION_REAPER_INTERVAL_SECONDS: int = 60
+    MAX_SESSIONS: int = 200
+    SESSION_MAX_CHUNKS: int = 20_000
+    SESSION_MAX_DISK_BYTES: int = 200 * 1024 * 1024
+
+    # LLM gateway: shared client, rate limits and retries
+    LLM_REQUESTS_PER_MINUTE: int = 30
+    LLM_TOKENS_PER_MINUTE: int = 60_000
+    LLM_COMPLETION_TOKENS_ESTIMATE: int = 1024
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_RETRIES: int = 4
+    LLM_RETRY_BASE_SECONDS: float = 0.5
+    LLM_RETRY_MAX_SECONDS: float = 20.0
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 60.0
+
+    # Profiling: requests carrying PROFILE_HEADER are sampled and written to PROFILE_DIR
+    PROFILING_ENABLED: bool = False
+    PROFILE_HEADER: str = "X-Debug-Profile"
+    PROFILE_DIR: str = "backend/profiles"
+    PROFILE_INTERVAL_SECONDS: float = 0.005
+    PROFILE_MAX_SECONDS: float = 120.0
+
     # Logging
     LOG_LEVEL: str = "INFO"
 
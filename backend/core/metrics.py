@@ -0,0 +1,288 @@
+import math
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+from backend.core.logging import logger
+
+# Minimal Prometheus text exposition (format 0.0.4), kept in-house so the
+# service needs no client library. Metrics are module-level objects created
+# at import time and may be updated from any thread.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(pairs: Sequence[Tuple[str, Any]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _value(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(float(value))
+
+class MetricsRegistry:
+    def __init__(self):
+        self._collectors: List[Any] = []
+        self._names = set()
+        self._lock = threading.Lock()
+
+    def register(self, collector: Any) -> None:
+        with self._lock:
+            if collector.name in self._names:
+                raise ValueError(f"Metric already registered: {collector.name}")
+            self._names.add(collector.name)
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for collector in collectors:
+            try:
+                lines.extend(collector.render())
+            except Exception as e:
+                # One broken stats source must not take the whole scrape down
+                logger.warning(f"Failed to collect metric {collector.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Unlabelled metrics are exported as zero before their first update
+            self.labels()
+        registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: Any, **kwargs: Any):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _samples(self) -> Iterator[Tuple[str, Sequence[Tuple[str, Any]], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type}"]
+        for suffix, pairs, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_labels(pairs)} {_value(value)}")
+        return lines
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for key, child in self._items():
+            yield "", list(zip(self.labelnames, key)), child.value
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def _samples(self):
+        for key, child in self._items():
+            yield "", list(zip(self.labelnames, key)), child.value
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self):
+        for key, child in self._items():
+            pairs = list(zip(self.labelnames, key))
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield "_bucket", pairs + [("le", _value(float(bound)))], cumulative
+            yield "_sum", pairs, total
+            yield "_count", pairs, cumulative
+
+# Exposes an existing stats() dict as gauges at scrape time: numbers become
+# {prefix}_{key}, nested dicts become one gauge labelled by their keys
+class StatsCollector:
+    def __init__(self, name: str, documentation: str, source: Callable[[], Dict[str, Any]], label: str = "kind"):
+        self.name = name
+        self.documentation = documentation
+        self.source = source
+        self.label = label
+        registry.register(self)
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        for key, value in self.source().items():
+            name = f"{self.name}_{key}"
+            if isinstance(value, dict):
+                samples = [([(self.label, nested)], number) for nested, number in value.items() if isinstance(number, (int, float))]
+            elif isinstance(value, (int, float)):
+                samples = [([], value)]
+            else:
+                continue
+            lines.append(f"# HELP {name} {_escape(self.documentation)} ({key})")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{_labels(pairs)} {_value(number)}" for pairs, number in samples)
+        return lines
+
+def timed_iter(iterable: Iterable[Any], timings: Dict[str, float], stage: str) -> Iterator[Any]:
+    # Adds the time spent producing each item to timings[stage]; for nested
+    # generators that includes the time of the stages they pull from
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+        yield item
+
+# Ingestion
+INGESTION_STAGES = ("load", "split", "embed", "insert")
+INGESTION_STAGE_SECONDS = Histogram(
+    "qa_agent_ingestion_stage_seconds", "Time spent per file in each ingestion stage", ["stage"]
+)
+INGESTION_FILES = Counter(
+    "qa_agent_ingestion_files_total", "Uploaded files by ingestion outcome", ["result"]
+)
+INGESTION_CHUNKS = Counter(
+    "qa_agent_ingestion_chunks_total", "Chunks embedded, reused from a previous upload or removed", ["result"]
+)
+INGESTION_FILE_CHUNKS = Histogram(
+    "qa_agent_ingestion_file_chunks", "Chunks indexed per ingested file", buckets=COUNT_BUCKETS
+)
+
+# Retrieval
+RETRIEVAL_SECONDS = Histogram(
+    "qa_agent_retrieval_seconds", "Retrieval latency by source", ["source"]
+)
+RETRIEVAL_DOCUMENTS = Histogram(
+    "qa_agent_retrieval_documents", "Chunks returned per retrieval", ["source"], buckets=COUNT_BUCKETS
+)
+
+# LLM
+LLM_REQUEST_SECONDS = Histogram(
+    "qa_agent_llm_request_seconds", "LLM provider call latency per attempt", ["endpoint", "outcome"],
+    buckets=LLM_LATENCY_BUCKETS
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "qa_agent_llm_queue_wait_seconds", "Time spent waiting for LLM gateway admission", ["priority"]
+)
+LLM_TOKENS = Counter(
+    "qa_agent_llm_tokens_total", "LLM tokens used per endpoint", ["endpoint", "kind"]
+)
+
+# HTTP
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "qa_agent_http_requests_in_flight", "HTTP requests currently being served"
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "qa_agent_http_request_seconds", "HTTP request latency until the response starts", ["method", "handler", "status"]
+)
@@ -0,0 +1,318 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import asyncio
+import weakref
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from backend.core.config import get_settings
+from backend.core.logging import logger
+
+settings = get_settings()
+
+# Where time goes, by the innermost frame matching "<file>:<function>".
+# Checked in order, so more specific patterns come first.
+CATEGORIES = [
+    ("splitter", ("langchain_text_splitters/", "html_splitter.py", "document_loader.py:iter_chunks")),
+    ("loaders", ("document_loaders/", "unstructured/", "fitz/", "pymupdf/", "dom_index.py", "document_loader.py", "pdf_extractor.py")),
+    ("embeddings", (
+        "sentence_transformers/", "transformers/", "torch/", "tokenizers/", "onnxruntime/", "langchain_huggingface/",
+        "embedding_service.py", "embedding_batcher.py", "embedding_cache.py", "onnx_embeddings.py",
+    )),
+    ("milvus", ("pymilvus/", "langchain_milvus/", "grpc/")),
+    ("vector_store", ("numpy_vector_store.py", "hnswlib")),
+    # The provider SDK sits above its HTTP client, so network waits land here too
+    ("llm", ("langchain_groq/", "groq/", "langchain_core/language_models/", "llm_gateway.py")),
+]
+
+# Frames of a thread blocked on a lock, queue or selector; the thread counts as waiting
+_BLOCKING_FILES = ("threading.py", "queue.py", "selectors.py")
+# Loops that park a pool or daemon thread between jobs; such samples are dropped
+_IDLE_FRAMES = {
+    ("concurrent/futures/thread.py", "_worker"),
+    ("embedding_batcher.py", "_run"),
+    ("anyio/_backends/_asyncio.py", "run"),
+    ("profiling.py", "_sample_loop"),
+}
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+_running: List["RequestProfile"] = []
+_previous_factory = None
+
+FrameKey = Tuple[str, str, int]
+
+def _short_path(filename: str) -> str:
+    filename = filename.replace(os.sep, "/")
+    for marker in ("/site-packages/", "/dist-packages/"):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    cwd = os.getcwd().replace(os.sep, "/") + "/"
+    if filename.startswith(cwd):
+        return filename[len(cwd):]
+    if "/lib/python" in filename:
+        # Standard library: keep the path below the version directory
+        return filename.split("/lib/python", 1)[1].split("/", 1)[-1]
+    return filename
+
+def _frame_key(frame) -> FrameKey:
+    code = frame.f_code
+    return code.co_name, _short_path(code.co_filename), code.co_firstlineno
+
+def _thread_stack(frame) -> List[FrameKey]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_key(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def _await_stack(coro) -> List[FrameKey]:
+    # Follows a suspended task's await chain down to the innermost coroutine
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_key(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return stack
+
+def _delegates(task: asyncio.Task, stack: List[FrameKey]) -> bool:
+    # Waiting on child tasks or a worker thread, which are sampled themselves
+    awaited = getattr(task, "_fut_waiter", None)
+    if isinstance(awaited, asyncio.Task) or type(awaited).__name__ == "_GatheringFuture":
+        return True
+    return stack[-1][0] == "to_thread" and stack[-1][1].endswith("asyncio/threads.py")
+
+def categorize(stack: List[FrameKey]) -> str:
+    for name, path, _ in reversed(stack):
+        location = f"{path}:{name}"
+        for category, patterns in CATEGORIES:
+            if any(pattern in location for pattern in patterns):
+                return category
+    return "other"
+
+def _is_idle(key: FrameKey) -> bool:
+    name, path, _ = key
+    return any(path.endswith(idle_path) and name == idle_name for idle_path, idle_name in _IDLE_FRAMES)
+
+def _thread_label(name: str) -> str:
+    # blocking-io_7 and blocking-io_3 aggregate as one root
+    return "thread:" + re.sub(r"_\d+$", "", name)
+
+# Samples every thread's stack plus the suspended coroutine stacks of the
+# request's own tasks. The event loop thread only counts while one of those
+# tasks is running on it. Worker threads cannot be told apart by request, so
+# requests running at the same time share their thread samples.
+class RequestProfile:
+    def __init__(self, name: str, interval: float, max_seconds: float):
+        self.name = name
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self.samples: List[Tuple[Tuple[FrameKey, ...], float, str]] = []
+        self.started = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _sample_loop(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            if now - self.started > self.max_seconds:
+                logger.warning(f"Profile {self.name} hit PROFILE_MAX_SECONDS, sampling stopped")
+                return
+            try:
+                self._sample(now - last)
+            except Exception as e:
+                # Reads another thread's state; a racing mutation only costs this sample
+                logger.debug(f"Skipped profile sample: {e}")
+            last = now
+
+    def _sample(self, weight: float) -> None:
+        current = asyncio.current_task(self.loop)
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == threading.get_ident():
+                continue
+            stack = _thread_stack(frame)
+            if ident == self.loop_thread:
+                if current is not None and current in self.tasks:
+                    self._record(("event-loop", "", 0), stack, weight)
+                continue
+            self._record((_thread_label(names.get(ident, "unknown")), "", 0), stack, weight)
+
+        for task in list(self.tasks):
+            if task is current or task.done():
+                continue
+            stack = _await_stack(task.get_coro())
+            if stack and not _delegates(task, stack):
+                self.samples.append(((("await", "", 0), *stack), weight, "waiting"))
+
+    def _record(self, root: FrameKey, stack: List[FrameKey], weight: float) -> None:
+        blocked = stack
+        while blocked and blocked[-1][1].endswith(_BLOCKING_FILES):
+            blocked = blocked[:-1]
+        if not blocked or _is_idle(blocked[-1]):
+            return
+        state = "waiting" if len(blocked) < len(stack) else "running"
+        self.samples.append(((root, *stack), weight, state))
+
+    def summary(self) -> Dict[str, Any]:
+        # Threads and tasks are sampled side by side, so the category totals
+        # can add up to more than the request's wall-clock duration
+        categories: Dict[str, Dict[str, float]] = {}
+        for stack, weight, state in self.samples:
+            entry = categories.setdefault(categorize(list(stack[1:])), {"running_seconds": 0.0, "waiting_seconds": 0.0})
+            entry[f"{state}_seconds"] += weight
+        return {
+            "name": self.name,
+            "duration_seconds": round(self.duration, 4),
+            "samples": len(self.samples),
+            "interval_seconds": self.interval,
+            "categories": {
+                category: {key: round(value, 4) for key, value in entry.items()}
+                for category, entry in sorted(categories.items(), key=lambda item: -sum(item[1].values()))
+            },
+        }
+
+    def collapsed(self) -> str:
+        # Brendan Gregg's folded format: "root;caller;callee <samples>"
+        counts = Counter(
+            ";".join(name if not path else f"{name} ({path}:{line})" for name, path, line in stack)
+            for stack, _, _ in self.samples
+        )
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+    def speedscope(self) -> Dict[str, Any]:
+        frames: Dict[FrameKey, int] = {}
+        for stack, _, _ in self.samples:
+            for key in stack:
+                frames.setdefault(key, len(frames))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": settings.APP_NAME,
+            "shared": {"frames": [
+                {"name": name, **({"file": path, "line": line} if path else {})} for name, path, line in frames
+            ]},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weight for _, weight, _ in self.samples),
+                "samples": [[frames[key] for key in stack] for stack, _, _ in self.samples],
+                "weights": [weight for _, weight, _ in self.samples],
+            }],
+        }
+
+    def write(self, base_path: str, output_format: str) -> Dict[str, Any]:
+        os.makedirs(os.path.dirname(base_path), exist_ok=True)
+        if output_format == "speedscope":
+            with open(f"{base_path}.speedscope.json", "w") as f:
+                json.dump(self.speedscope(), f)
+        else:
+            with open(f"{base_path}.collapsed.txt", "w") as f:
+                f.write(self.collapsed())
+        summary = self.summary()
+        with open(f"{base_path}.summary.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+def _task_factory(loop, coro, **kwargs):
+    # Installed only while a profile runs. Tasks spawned by a profiled request
+    # (gather, task groups, streaming) inherit its context and join its profile.
+    if _previous_factory is not None:
+        task = _previous_factory(loop, coro, **kwargs)
+    else:
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+    context = kwargs.get("context")
+    profile = context.get(_active_profile) if context is not None else _active_profile.get()
+    if profile is not None:
+        profile.tasks.add(task)
+    return task
+
+def _attach(profile: RequestProfile) -> None:
+    global _previous_factory
+    if not _running:
+        _previous_factory = profile.loop.get_task_factory()
+        profile.loop.set_task_factory(_task_factory)
+    _running.append(profile)
+
+def _detach(profile: RequestProfile) -> None:
+    _running.remove(profile)
+    if not _running and profile.loop.get_task_factory() is _task_factory:
+        profile.loop.set_task_factory(_previous_factory)
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("_.") or "root"
+
+def _profile_path(scope: dict, session_id: str) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    name = f"{stamp}-{scope['method'].lower()}-{_safe_name(scope['path'])}-{uuid.uuid4().hex[:6]}"
+    return os.path.join(settings.PROFILE_DIR, _safe_name(session_id or "no-session"), name)
+
+# Pure ASGI so requests without the header pass straight through; only added
+# to the app when PROFILING_ENABLED is set. The header value picks the output
+# format: "speedscope", anything else writes collapsed stacks.
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.PROFILE_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        requested = headers.get(self.header)
+        if requested is None:
+            return await self.app(scope, receive, send)
+
+        output_format = requested.decode().strip().lower()
+        base_path = _profile_path(scope, headers.get(b"x-session-id", b"").decode())
+        profile = RequestProfile(
+            f"{scope['method']} {scope['path']}", settings.PROFILE_INTERVAL_SECONDS, settings.PROFILE_MAX_SECONDS
+        )
+
+        async def send_with_path(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-profile-path", base_path.encode())]
+            await send(message)
+
+        token = _active_profile.set(profile)
+        _attach(profile)
+        profile.tasks.add(asyncio.current_task())
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_path)
+        finally:
+            profile.stop()
+            _detach(profile)
+            _active_profile.reset(token)
+            try:
+                summary = await asyncio.to_thread(profile.write, base_path, output_format)
+                breakdown = ", ".join(
+                    f"{category} {sum(entry.values()):.3f}s" for category, entry in summary["categories"].items()
+                )
+                logger.info(f"Profiled {profile.name} in {profile.duration:.3f}s -> {base_path} ({breakdown})")
+            except Exception as e:
+                logger.error(f"Failed to write profile {base_path}: {e}", exc_info=True)
@@ -1,18 +1,61 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from backend.core.config import get_settings
 from backend.core.logging import logger
+from backend.core.profiling import ProfilingMiddleware
+from backend.core.metrics import registry, StatsCollector, HTTP_REQUESTS_IN_FLIGHT, HTTP_REQUEST_SECONDS
+from backend.services.warmup import warm_up, mark_ready, readiness
+from backend.services.session_manager import run_session_reaper, session_registry
+from backend.services.vector_store import close_vector_stores
+from backend.services.pdf_extractor import close_pdf_pool
+from backend.services.semantic_cache import semantic_cache
+from backend.services.session_context import session_contexts
+from backend.services.embedding_service import embeddings
+from backend.services.embedding_cache import CachedEmbeddings
+from backend.services.llm_gateway import llm_gateway
 
 settings = get_settings()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # asyncio.to_thread uses the loop's default executor; size it for I/O-bound
+    # work instead of the CPU-based default so slow Milvus calls don't queue up
+    executor = ThreadPoolExecutor(max_workers=settings.BLOCKING_IO_THREADS, thread_name_prefix="blocking-io")
+    asyncio.get_running_loop().set_default_executor(executor)
+    # Startup phase: load the embedding model in the background so the port
+    # opens immediately; /ready flips once it is usable
+    warmup_task = None
+    if settings.WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    else:
+        mark_ready()
+    # Expires idle sessions even when the browser never sent /session/cleanup
+    reaper_task = asyncio.create_task(run_session_reaper())
+    yield
+    reaper_task.cancel()
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await asyncio.to_thread(close_vector_stores)
+    close_pdf_pool()
+    executor.shutdown(wait=False)
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
+    lifespan=lifespan,
     docs_url=f"{settings.API_PREFIX}/docs",
     openapi_url=f"{settings.API_PREFIX}/openapi.json"
 )
 
+# Added first so it runs innermost, in the same task as the endpoint
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +65,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Last-access tracking for the session reaper. Pure ASGI so a session stays
+# in use until the last body chunk of a streamed response has been sent (or
+# the client disconnects), not just until the response headers go out.
+class SessionAccessMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        session_id = dict(scope["headers"]).get(b"x-session-id", b"").decode()
+        if not session_id:
+            return await self.app(scope, receive, send)
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                session_registry.release(session_id)
+
+        async def send_and_release(message):
+            try:
+                await send(message)
+            finally:
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    release()
+
+        session_registry.acquire(session_id)
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            release()
+
+app.add_middleware(SessionAccessMiddleware)
+
+# Added last so it wraps every other middleware. Streaming responses are
+# timed until their headers go out; LLM streaming shows up in the LLM metrics
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Endpoint names rather than raw paths keep the label set bounded
+        handler = getattr(request.scope.get("route"), "name", "unmatched")
+        HTTP_REQUEST_SECONDS.labels(request.method, handler, status).observe(time.perf_counter() - started)
+
 # Global Exception Handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -35,6 +132,25 @@ async def global_exception_handler(request: Request, exc: Exception):
 async def health_check():
     return {"status": "healthy", "version": settings.VERSION}
 
+@app.get("/ready")
+async def readiness_check():
+    state = readiness()
+    if not state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting", **state})
+    return {"status": "ready", **state}
+
+# Existing in-process stats, read at scrape time
+StatsCollector("qa_agent_semantic_cache", "Semantic answer cache", semantic_cache.stats)
+StatsCollector("qa_agent_session_contexts", "In-memory session contexts", session_contexts.stats)
+StatsCollector("qa_agent_sessions", "Session registry and reaper", session_registry.stats, label="reason")
+StatsCollector("qa_agent_llm_gateway", "LLM gateway", llm_gateway.stats, label="priority")
+if isinstance(embeddings, CachedEmbeddings):
+    StatsCollector("qa_agent_embedding_cache", "Persistent embedding cache", embeddings.stats)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Import and include routers 
 from backend.api.routers import ingestion, generation, session
 app.include_router(ingestion.router, prefix=f"{settings.API_PREFIX}/ingestion", tags=["Ingestion"])
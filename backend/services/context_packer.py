@@ -0,0 +1,145 @@
+import re
+import threading
+from typing import List, Optional, Set
+from langchain_core.documents import Document
+from backend.core.config import get_settings
+from backend.core.logging import logger
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+settings = get_settings()
+
+# Overlaps shorter than this are coincidence, not splitter overlap
+MIN_OVERLAP_CHARS = 20
+# Truncated tails shorter than this are not worth the header they carry
+MIN_SECTION_TOKENS = 48
+
+# Roughly one BPE token per word or punctuation mark
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]")
+_WORD = re.compile(r"\w+")
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+def _get_encoding():
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None and tiktoken is None:
+            # Logged once; the regex undercounts code and identifiers, so
+            # budgets and rate-limit estimates are only approximate
+            logger.warning("tiktoken is not installed, using approximate token counts")
+            _encoding = False
+        elif _encoding is None:
+            try:
+                _encoding = tiktoken.get_encoding(settings.CONTEXT_TOKENIZER)
+            except Exception as e:
+                logger.warning(f"tiktoken encoding {settings.CONTEXT_TOKENIZER} unavailable, using approximate counts: {e}")
+                _encoding = False
+        return _encoding or None
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(_APPROX_TOKEN.findall(text))
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    if budget <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= budget else encoding.decode(tokens[:budget])
+    matches = list(_APPROX_TOKEN.finditer(text))
+    return text if len(matches) <= budget else text[:matches[budget - 1].end()]
+
+def _overlap(left: str, right: str) -> int:
+    # Longest suffix of left that is a prefix of right
+    longest = min(len(left), len(right), settings.CONTEXT_MAX_OVERLAP_CHARS)
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def merge_adjacent(documents: List[Document]) -> List[Document]:
+    # Neighbouring splitter chunks of one source share their boundary text;
+    # stitch them back together so the shared text is sent once
+    merged: List[Document] = []
+    for doc in documents:
+        for index, kept in enumerate(merged):
+            if kept.metadata.get("source") != doc.metadata.get("source"):
+                continue
+            if size := _overlap(kept.page_content, doc.page_content):
+                merged[index] = Document(page_content=kept.page_content + doc.page_content[size:], metadata=kept.metadata)
+                break
+            if size := _overlap(doc.page_content, kept.page_content):
+                merged[index] = Document(page_content=doc.page_content + kept.page_content[size:], metadata=kept.metadata)
+                break
+        else:
+            merged.append(doc)
+    return merged
+
+def _jaccard(left: Set[str], right: Set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+def select_diverse(documents: List[Document]) -> List[Document]:
+    # Maximal marginal relevance over word sets: relevance comes from the
+    # retrieval rank, redundancy from overlap with chunks already chosen.
+    # Near-duplicates are dropped outright.
+    words = [set(_WORD.findall(doc.page_content.lower())) for doc in documents]
+    relevance = [1.0 - rank / len(documents) for rank in range(len(documents))]
+    remaining = list(range(len(documents)))
+    chosen: List[int] = []
+    while remaining:
+        scored = []
+        for i in remaining:
+            redundancy = max((_jaccard(words[i], words[j]) for j in chosen), default=0.0)
+            if redundancy >= settings.CONTEXT_DUPLICATE_THRESHOLD:
+                continue
+            lam = settings.CONTEXT_MMR_LAMBDA
+            scored.append((lam * relevance[i] - (1 - lam) * redundancy, i))
+        if not scored:
+            break
+        _, best = max(scored)
+        chosen.append(best)
+        remaining = [i for _, i in scored if i != best]
+    return [documents[i] for i in chosen]
+
+def _section(doc: Document) -> str:
+    return f"--- SOURCE: {doc.metadata.get('source', 'unknown')} ---\n{doc.page_content}"
+
+def pack_documents(documents: List[Document], budget: int, max_documents: Optional[int] = None) -> str:
+    # Keep the source visible so the LLM can fill grounded_in
+    selected = select_diverse(merge_adjacent(documents))[:max_documents]
+    sections: List[str] = []
+    remaining = budget
+    for doc in selected:
+        section = _section(doc)
+        tokens = count_tokens(section)
+        if tokens > remaining:
+            if remaining >= MIN_SECTION_TOKENS:
+                sections.append(truncate_to_tokens(section, remaining))
+            break
+        sections.append(section)
+        remaining -= tokens
+    logger.debug(f"Packed {len(sections)}/{len(documents)} chunks into {budget - remaining}/{budget} tokens")
+    return "\n\n".join(sections)
+
+def pack_text(text: str, budget: int) -> str:
+    # Keeps whole lines in order and cuts the first one that doesn't fit
+    lines: List[str] = []
+    remaining = budget
+    for line in text.strip().splitlines():
+        tokens = count_tokens(line) + 1
+        if tokens > remaining:
+            if remaining >= MIN_SECTION_TOKENS:
+                lines.append(truncate_to_tokens(line, remaining))
+            break
+        lines.append(line)
+        remaining -= tokens
+    return "\n".join(lines)
@@ -0,0 +1,90 @@
+import io
+import os
+import json
+import shutil
+from typing import BinaryIO, Iterable, Iterator, List
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from backend.core.logging import logger
+from backend.services.html_splitter import HTMLRegionSplitter
+from backend.services.pdf_extractor import iter_pdf_pages
+from backend.services.dom_index import build_dom_index, render_dom_index, save_dom_index
+
+# Plain text is read in blocks of roughly this many characters, cut on blank
+# lines, so large files never need to be held in memory at once.
+TEXT_BLOCK_SIZE = 64 * 1024
+
+def _iter_text_blocks(stream: BinaryIO) -> Iterator[str]:
+    block: List[str] = []
+    size = 0
+    for line in io.TextIOWrapper(stream, encoding="utf-8", errors="replace"):
+        block.append(line)
+        size += len(line)
+        if size >= TEXT_BLOCK_SIZE and not line.strip():
+            yield "".join(block)
+            block, size = [], 0
+    if block:
+        yield "".join(block)
+
+def iter_documents(stream: BinaryIO, filename: str, session_dir: str) -> Iterator[Document]:
+    ext = os.path.splitext(filename)[1].lower()
+
+    if ext == ".pdf":
+        # One Document per page, in order; large PDFs are extracted in parallel
+        yield from iter_pdf_pages(stream, filename)
+    elif ext == ".md":
+        from unstructured.partition.md import partition_md
+        elements = partition_md(text=stream.read().decode("utf-8"))
+        yield Document(page_content="\n\n".join(str(el) for el in elements), metadata={"source": filename})
+    elif ext == ".json":
+        text = json.dumps(json.load(stream), indent=2)
+        yield Document(page_content=text, metadata={"source": filename})
+    elif ext == ".html":
+        # Save full HTML for RAG
+        html_path = os.path.join(session_dir, filename)
+        with open(html_path, 'wb') as f:
+            shutil.copyfileobj(stream, f)
+
+        with open(html_path, 'r', encoding='utf-8') as f:
+            raw_html = f.read()
+
+        # Compact selector index used by script generation instead of raw HTML
+        dom_index = build_dom_index(raw_html, filename)
+        save_dom_index(session_dir, filename, dom_index)
+        compact_size = len(render_dom_index(dom_index))
+        logger.info(
+            f"DOM index for {filename}: {len(raw_html)} -> {compact_size} chars "
+            f"({1 - compact_size / max(len(raw_html), 1):.0%} smaller)"
+        )
+        yield Document(
+            page_content=raw_html,
+            metadata={"source": filename, "type": "html_source"}
+        )
+    elif ext == ".txt":
+        for block in _iter_text_blocks(stream):
+            yield Document(page_content=block, metadata={"source": filename})
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+def iter_chunks(documents: Iterable[Document], filename: str, session_id: str) -> Iterator[Document]:
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    html_splitter = HTMLRegionSplitter(chunk_size=1000, chunk_overlap=200)
+
+    for doc in documents:
+        # Add metadata
+        doc.metadata["source"] = filename
+        doc.metadata["session_id"] = session_id
+        if doc.metadata.get("type") == "html_source":
+            doc.metadata["type"] = "html_source"
+        else:
+            doc.metadata["type"] = "document"
+
+        # Split one page/block at a time so only its chunks are alive
+        if doc.metadata["type"] == "html_source":
+            yield from html_splitter.split_documents([doc])
+        else:
+            yield from text_splitter.split_documents([doc])
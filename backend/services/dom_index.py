@@ -0,0 +1,206 @@
+import os
+import re
+import json
+from typing import Any, Dict, List, Optional
+from bs4 import BeautifulSoup, Tag
+
+# Distils an HTML page into the parts a Selenium script needs: interactive
+# elements, their labels and selectors, form structure, id-bearing output
+# elements used in assertions, and UI strings that inline scripts write into
+# the page. Layout markup, CSS and script bodies are dropped.
+
+INTERACTIVE_TAGS = {"input", "select", "textarea", "button", "a"}
+HANDLER_ATTRS = ("onclick", "onchange", "onsubmit", "oninput")
+TEXT_LIMIT = 80
+DOM_INDEX_SUFFIX = ".dom.json"
+
+# String literals assigned to textContent/innerText or passed to alert()
+_SCRIPT_TEXT = re.compile(
+    r"""(?:\.(?:textContent|innerText)\s*=\s*|alert\(\s*)(["'`])((?:(?!\1).){3,200}?)\1"""
+)
+
+def _text(el: Tag) -> str:
+    text = " ".join(el.get_text(" ", strip=True).split())
+    return text[:TEXT_LIMIT]
+
+def _css_path(el: Tag) -> str:
+    if el.get("id"):
+        return f"#{el['id']}"
+    parts = []
+    node = el
+    while isinstance(node, Tag) and node.name not in ("html", "[document]"):
+        if node.get("id"):
+            parts.append(f"#{node['id']}")
+            break
+        siblings = [s for s in node.parent.find_all(node.name, recursive=False)] if node.parent else [node]
+        part = node.name
+        if len(siblings) > 1:
+            part += f":nth-of-type({siblings.index(node) + 1})"
+        parts.append(part)
+        node = node.parent
+    return " > ".join(reversed(parts))
+
+def _xpath(el: Tag) -> str:
+    if el.get("id"):
+        return f"//*[@id='{el['id']}']"
+    if el.get("name") and el.name in ("input", "select", "textarea"):
+        return f"//{el.name}[@name='{el['name']}']"
+    text = _text(el)
+    if el.name in ("button", "a") and text and "'" not in text:
+        return f"//{el.name}[normalize-space()='{text}']"
+    parts = []
+    node = el
+    while isinstance(node, Tag) and node.name != "[document]":
+        siblings = node.parent.find_all(node.name, recursive=False) if node.parent else [node]
+        parts.append(f"{node.name}[{siblings.index(node) + 1}]" if len(siblings) > 1 else node.name)
+        node = node.parent
+    return "/" + "/".join(reversed(parts))
+
+def _label_for(el: Tag, soup: BeautifulSoup) -> Optional[str]:
+    if el.get("aria-label"):
+        return el["aria-label"]
+    if el.get("id"):
+        label = soup.find("label", attrs={"for": el["id"]})
+        if label:
+            return _text(label)
+    wrapping = el.find_parent("label")
+    if wrapping:
+        return _text(wrapping)
+    # <label>Name</label><input> siblings without a for attribute
+    previous = el.find_previous_sibling()
+    if previous is not None and previous.name == "label" and not previous.get("for"):
+        return _text(previous)
+    return None
+
+def _is_hidden(el: Tag) -> bool:
+    style = (el.get("style") or "").replace(" ", "")
+    return "hidden" in (el.get("class") or []) or "display:none" in style or el.get("type") == "hidden"
+
+def _describe(el: Tag, soup: BeautifulSoup) -> Dict[str, Any]:
+    entry = {"tag": el.name}
+    for attr in ("type", "id", "name", "placeholder", "value", "href", "role"):
+        if el.get(attr):
+            entry[attr] = el[attr]
+    for attr in HANDLER_ATTRS:
+        if el.get(attr):
+            entry["handler"] = f"{attr}={el[attr]}"
+            break
+    if el.name in ("input", "select", "textarea"):
+        label = _label_for(el, soup)
+        if label:
+            entry["label"] = label
+        if el.has_attr("required"):
+            entry["required"] = True
+    else:
+        text = _text(el)
+        if text:
+            entry["text"] = text
+    if el.name == "select":
+        entry["options"] = [option.get("value", _text(option)) for option in el.find_all("option")]
+    form = el.find_parent("form")
+    if form is not None and form.get("id"):
+        entry["form"] = form["id"]
+    if _is_hidden(el):
+        entry["hidden"] = True
+    entry["css"] = _css_path(el)
+    entry["xpath"] = _xpath(el)
+    return entry
+
+def build_dom_index(html: str, filename: str) -> Dict[str, Any]:
+    soup = BeautifulSoup(html, "html.parser")
+
+    dynamic_text = []
+    for script in soup.find_all("script"):
+        for match in _SCRIPT_TEXT.finditer(script.get_text()):
+            if match.group(2) not in dynamic_text:
+                dynamic_text.append(match.group(2))
+    for tag in soup(["script", "style", "noscript", "svg", "link", "meta"]):
+        tag.decompose()
+
+    forms = []
+    for form in soup.find_all("form"):
+        fields = form.find_all(["input", "select", "textarea", "button"])
+        forms.append({
+            "id": form.get("id"),
+            "css": _css_path(form),
+            "handler": next((f"{attr}={form[attr]}" for attr in HANDLER_ATTRS if form.get(attr)), None),
+            "fields": [_css_path(field) for field in fields],
+        })
+
+    elements = []
+    outputs = []
+    for el in soup.find_all(True):
+        if el.name in INTERACTIVE_TAGS or any(el.get(attr) for attr in HANDLER_ATTRS):
+            if el.name == "a" and not el.get("href") and not el.get("onclick"):
+                continue
+            if el.name != "form":
+                elements.append(_describe(el, soup))
+        elif el.get("id") and el.name not in ("html", "body", "form", "label"):
+            # Id-bearing non-interactive elements are what assertions target
+            output = {"tag": el.name, "id": el["id"]}
+            text = _text(el)
+            # Containers would only repeat the text of their own id children
+            if text and not el.find(id=True):
+                output["text"] = text
+            if _is_hidden(el):
+                output["hidden"] = True
+            outputs.append(output)
+
+    return {
+        "source": filename,
+        "title": soup.title.get_text(strip=True) if soup.title else None,
+        "forms": forms,
+        "elements": elements,
+        "outputs": outputs,
+        "dynamic_text": dynamic_text,
+    }
+
+def _render_attrs(entry: Dict[str, Any], keys: List[str]) -> str:
+    parts = []
+    for key in keys:
+        value = entry.get(key)
+        if value is True:
+            parts.append(key)
+        elif isinstance(value, list):
+            parts.append(f"{key}=[{', '.join(map(str, value))}]")
+        elif value:
+            parts.append(f'{key}="{value}"')
+    return " ".join(parts)
+
+def render_dom_index(index: Dict[str, Any]) -> str:
+    title = f" ({index['title']})" if index.get("title") else ""
+    lines = [f"--- PAGE: {index['source']}{title} ---"]
+
+    if index["forms"]:
+        lines.append("Forms:")
+        for form in index["forms"]:
+            handler = f" {form['handler']}" if form.get("handler") else ""
+            lines.append(f"  form {form['css']}{handler} fields: {', '.join(form['fields'])}")
+
+    lines.append("Interactive elements:")
+    element_keys = ["type", "name", "label", "text", "placeholder", "value", "href", "options",
+                    "handler", "form", "required", "hidden"]
+    for entry in index["elements"]:
+        lines.append(f"  {entry['tag']} css={entry['css']} xpath={entry['xpath']} {_render_attrs(entry, element_keys)}".rstrip())
+
+    if index["outputs"]:
+        lines.append("Elements with ids (assertion targets):")
+        for entry in index["outputs"]:
+            lines.append(f"  {entry['tag']}#{entry['id']} {_render_attrs(entry, ['text', 'hidden'])}".rstrip())
+
+    if index["dynamic_text"]:
+        lines.append("Text set by page scripts:")
+        lines.extend(f'  "{text}"' for text in index["dynamic_text"])
+
+    return "\n".join(lines)
+
+def save_dom_index(session_dir: str, filename: str, index: Dict[str, Any]) -> None:
+    with open(os.path.join(session_dir, filename + DOM_INDEX_SUFFIX), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+
+def load_dom_index(session_dir: str, filename: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(session_dir, filename + DOM_INDEX_SUFFIX)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,105 @@
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import List, Tuple
+from langchain_core.embeddings import Embeddings
+from backend.core.logging import logger
+
+# Merges concurrent embed calls from different requests into one forward pass.
+# A single worker thread takes the first pending request, then keeps collecting
+# until max_batch_size texts are queued or max_wait_ms has passed.
+# Queries go through embed_documents on the wrapped model, which for
+# all-MiniLM-L6-v2 produces the same vectors as embed_query.
+class BatchingEmbeddings(Embeddings):
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int, max_wait_ms: float):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        # Also restarts a worker that died, so callers never queue behind a dead thread
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def _submit(self, texts: List[str]) -> Future:
+        self._ensure_worker()
+        future = Future()
+        self._pending.put((texts, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._run_batch()
+            except Exception as e:
+                logger.error(f"Embedding batcher iteration failed: {e}")
+
+    def _run_batch(self) -> None:
+        # Callers cancelled while queued (client disconnects, cancelled gather
+        # tasks) are dropped here; the rest can no longer be cancelled
+        batch = []
+        size = 0
+        item = self._pending.get()
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            if item[1].set_running_or_notify_cancel():
+                batch.append(item)
+                size += len(item[0])
+            if size >= self.max_batch_size:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+        if not batch:
+            return
+
+        texts = [text for request_texts, _ in batch for text in request_texts]
+        try:
+            vectors = self.embeddings.embed_documents(texts)
+        except Exception as e:
+            logger.error(f"Batched embedding of {len(texts)} texts failed: {e}")
+            for _, future in batch:
+                try:
+                    future.set_exception(e)
+                except InvalidStateError:
+                    pass
+            return
+
+        offset = 0
+        for request_texts, future in batch:
+            try:
+                future.set_result(vectors[offset:offset + len(request_texts)])
+            except InvalidStateError:
+                pass
+            offset += len(request_texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Ingestion batches are already large enough to run on their own
+        if len(texts) >= self.max_batch_size:
+            return self.embeddings.embed_documents(texts)
+        return self._submit(texts).result()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._submit([text]).result()[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) >= self.max_batch_size:
+            return await asyncio.to_thread(self.embeddings.embed_documents, texts)
+        return await asyncio.wrap_future(self._submit(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vectors = await asyncio.wrap_future(self._submit([text]))
+        return vectors[0]
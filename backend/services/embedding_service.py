@@ -0,0 +1,74 @@
+import threading
+from typing import Callable, List
+from langchain_core.embeddings import Embeddings
+from backend.core.config import get_settings
+from backend.core.logging import logger
+from backend.services.embedding_cache import CachedEmbeddings
+from backend.services.embedding_batcher import BatchingEmbeddings
+
+settings = get_settings()
+
+# Defers building the wrapped model (and importing its framework) until the
+# first embed call or an explicit load(), so importing the app stays cheap.
+class LazyEmbeddings(Embeddings):
+
+    def __init__(self, factory: Callable[[], Embeddings]):
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Embeddings:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.load().embed_query(text)
+
+def _create_model() -> Embeddings:
+    if settings.EMBEDDING_BACKEND == "onnx":
+        from backend.services.onnx_embeddings import OnnxEmbeddings
+
+        return OnnxEmbeddings(settings.ONNX_MODEL_DIR, num_threads=settings.ONNX_NUM_THREADS)
+    if settings.EMBEDDING_BACKEND != "huggingface":
+        raise ValueError(f"Unsupported embedding backend: {settings.EMBEDDING_BACKEND}")
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
+    return HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
+
+def cache_model_name() -> str:
+    # Quantized vectors differ slightly, so they get their own cache keys
+    if settings.EMBEDDING_BACKEND == "onnx":
+        return f"{settings.EMBEDDING_MODEL}:onnx-int8"
+    return settings.EMBEDDING_MODEL
+
+embedding_model = LazyEmbeddings(_create_model)
+
+# Initialize Embeddings
+embeddings = BatchingEmbeddings(
+    embedding_model,
+    max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+)
+if settings.EMBEDDING_CACHE_ENABLED:
+    embeddings = CachedEmbeddings(
+        embeddings,
+        model_name=cache_model_name(),
+        path=settings.EMBEDDING_CACHE_PATH,
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+    )
+
+def warm_up_embeddings() -> None:
+    # Goes straight to the model: a cached dummy vector would skip the load
+    embedding_model.load().embed_query("warm-up")
@@ -0,0 +1,84 @@
+from typing import Iterator, List
+from bs4 import BeautifulSoup, Comment, Tag
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Splits HTML by semantic region instead of by character count. Each form,
+# fieldset, section or modal becomes its own chunk, rendered as minimal markup
+# (no script, style, classes or layout wrappers) and tagged with the ids of the
+# elements it contains. Regions larger than chunk_size are split further.
+
+REGION_TAGS = {"form", "fieldset", "section", "dialog"}
+NOISE_TAGS = ["script", "style", "noscript", "svg", "link", "meta", "head"]
+KEPT_ATTRS = {"id", "name", "type", "placeholder", "value", "for", "href", "role",
+              "required", "onclick", "onchange", "onsubmit", "min", "max", "disabled"}
+# Wrappers that carry no meaning without their classes are unwrapped
+LAYOUT_TAGS = {"div", "span"}
+
+def _is_region(el: Tag) -> bool:
+    if el.name in REGION_TAGS or el.get("role") in ("dialog", "alertdialog"):
+        return True
+    return any("modal" in cls for cls in el.get("class") or [])
+
+def _region_name(el: Tag) -> str:
+    return f"{el.name}#{el['id']}" if el.get("id") else el.name
+
+def _render(el: Tag) -> str:
+    for node in el.find_all(True):
+        if node.name in LAYOUT_TAGS and not node.get("id"):
+            node.unwrap()
+            continue
+        node.attrs = {key: value for key, value in node.attrs.items() if key.startswith("aria-") or key in KEPT_ATTRS}
+    el.attrs = {key: value for key, value in el.attrs.items() if key.startswith("aria-") or key in KEPT_ATTRS}
+    lines = (line.strip() for line in str(el).splitlines())
+    return "\n".join(line for line in lines if line)
+
+class HTMLRegionSplitter:
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=["\n\n", "\n", " ", ""]
+        )
+
+    def split_html(self, html: str) -> List[Document]:
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(NOISE_TAGS):
+            tag.decompose()
+        for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+            comment.extract()
+
+        # Innermost regions first, so an outer region does not repeat them
+        regions = [el for el in soup.find_all(True) if _is_region(el)]
+        regions.sort(key=lambda el: len(list(el.parents)), reverse=True)
+
+        extracted = []
+        for region in regions:
+            name = _region_name(region)
+            element_ids = [node["id"] for node in region.find_all(id=True)]
+            if region.get("id"):
+                element_ids.insert(0, region["id"])
+            extracted.append((name, element_ids, region.extract()))
+        # Whatever sits outside every region forms one more chunk
+        remainder = soup.body or soup
+        extracted.append(("page", [node["id"] for node in remainder.find_all(id=True)], remainder))
+
+        documents = []
+        # Restore document order, which the innermost-first pass reversed
+        extracted.sort(key=lambda item: item[2].sourceline or 0)
+        for name, element_ids, region in extracted:
+            content = _render(region)
+            if not BeautifulSoup(content, "html.parser").get_text(strip=True) and not element_ids:
+                continue
+            documents.append(Document(
+                page_content=content,
+                metadata={"region": name, "element_ids": ",".join(element_ids)}
+            ))
+        return documents
+
+    def split_documents(self, documents: List[Document]) -> Iterator[Document]:
+        for doc in documents:
+            for region in self.split_html(doc.page_content):
+                region.metadata = {**doc.metadata, **region.metadata}
+                yield from self.text_splitter.split_documents([region])
@@ -0,0 +1,57 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Any, BinaryIO, Dict, Optional
+from langchain_core.documents import Document
+
+MANIFEST_FILE = "manifest.json"
+_HASH_BLOCK = 1024 * 1024
+
+# Per-session record of what is already in the vector store:
+#   {filename: {"content_hash": str, "chunks": {chunk_hash: [vector ids]}}}
+# Unchanged uploads are skipped and changed ones only embed/delete the chunks
+# that differ.
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+def _lock_for(session_dir: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(session_dir, threading.Lock())
+
+def hash_stream(stream: BinaryIO) -> str:
+    digest = hashlib.sha256()
+    while block := stream.read(_HASH_BLOCK):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def chunk_hash(chunk: Document) -> str:
+    # Metadata is part of the identity so page/region moves are re-indexed
+    payload = json.dumps([chunk.page_content, chunk.metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_manifest(session_dir: str) -> Dict[str, Any]:
+    path = os.path.join(session_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def get_file_entry(session_dir: str, filename: str) -> Optional[Dict[str, Any]]:
+    with _lock_for(session_dir):
+        return load_manifest(session_dir).get(filename)
+
+def update_file_entry(session_dir: str, filename: str, entry: Dict[str, Any]) -> None:
+    # Re-read under the lock so concurrent uploads to one session don't clobber
+    with _lock_for(session_dir):
+        manifest = load_manifest(session_dir)
+        manifest[filename] = entry
+        path = os.path.join(session_dir, MANIFEST_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+def forget_session(session_dir: str) -> None:
+    with _locks_guard:
+        _locks.pop(session_dir, None)
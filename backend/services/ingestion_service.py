@@ -1,114 +1,211 @@
 import os
-from typing import List
+import time
+import asyncio
+import queue
+import threading
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 from fastapi import UploadFile
-from langchain_community.document_loaders import PyMuPDFLoader, UnstructuredMarkdownLoader, JSONLoader, BSHTMLLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_milvus import Milvus
+from langchain_core.documents import Document
 from backend.core.config import get_settings
 from backend.core.logging import logger
-import tempfile
-import shutil
+from backend.core.metrics import (
+    INGESTION_STAGES, INGESTION_STAGE_SECONDS, INGESTION_FILES, INGESTION_CHUNKS, INGESTION_FILE_CHUNKS, timed_iter
+)
+from backend.services.document_loader import iter_documents, iter_chunks
+from backend.services.embedding_service import embeddings
+from backend.services.ingestion_manifest import hash_stream, chunk_hash, get_file_entry, update_file_entry
+from backend.services.vector_store import deferred_writes, get_session_vector_store, pin_session_vector_store
+from backend.services.lexical_index import LexicalIndex, get_lexical_index, pin_lexical_index
+from backend.services.semantic_cache import semantic_cache
+from backend.services.session_context import session_contexts
+from backend.services.session_manager import SessionQuotaError, check_disk_quota, session_chunk_count
 
 settings = get_settings()
 
-# Initialize Embeddings
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-# Initialize Milvus
-def get_vector_store(collection_name: str = "qa_agent_knowledge_base"):
-    logger.info(f"Connecting to Milvus collection: {collection_name}")
-    return Milvus(
-        embedding_function=embeddings,
-        connection_args={
-            "uri": settings.MILVUS_URI,
-            "token": settings.MILVUS_TOKEN
-        },
-        collection_name=collection_name,
-        auto_id=True,
-        drop_old=False 
-    )
+def batched(chunks: Iterable[Document], size: int) -> Iterator[List[Document]]:
+    iterator = iter(chunks)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+_DONE = object()
+
+def run_ingestion_pipeline(
+    chunks: Iterable[Document],
+    session_id: str,
+    known_chunks: Optional[Dict[str, List[Any]]] = None,
+    lexical_index: Optional[LexicalIndex] = None,
+    max_chunks: Optional[int] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> Tuple[Dict[str, List[Any]], int, int]:
+    # load -> split -> embed run on this thread while a second thread inserts.
+    # The bounded queue caps how many embedded batches are in flight, so memory
+    # stays flat and inserts start as soon as the first batch is ready.
+    # Chunks already listed in known_chunks (hash -> vector ids) are reused as-is
+    # and known chunks that no longer appear are deleted afterwards. The lexical
+    # index, when given, mirrors every insert and delete under the same ids.
+    # A failed run removes what it inserted, so the index is left as it was.
+    # Seconds spent embedding and inserting are added to timings when given.
+    timings = timings if timings is not None else {}
+    vector_store = get_session_vector_store(session_id)
+    # The numpy index is written once when the file is done, not per batch
+    with deferred_writes(vector_store):
+        pending = queue.Queue(maxsize=settings.INGESTION_INFLIGHT_BATCHES)
+        errors: List[Exception] = []
+        reusable = {digest: list(ids) for digest, ids in (known_chunks or {}).items()}
+        indexed: Dict[str, List[Any]] = {}
+        inserted: List[Any] = []
+
+        def insert_worker():
+            while (item := pending.get()) is not _DONE:
+                if errors:
+                    continue
+                digests, texts, vectors, metadatas = item
+                started = time.perf_counter()
+                try:
+                    ids = vector_store.add_embeddings(texts, vectors, metadatas)
+                    if lexical_index is not None:
+                        lexical_index.add(ids, texts, metadatas)
+                    timings["insert"] = timings.get("insert", 0.0) + time.perf_counter() - started
+                    inserted.extend(ids)
+                    for digest, chunk_id in zip(digests, ids):
+                        indexed.setdefault(digest, []).append(chunk_id)
+                except Exception as e:
+                    errors.append(e)
+
+        def new_chunks() -> Iterator[Tuple[str, Document]]:
+            for count, chunk in enumerate(chunks, start=1):
+                if max_chunks is not None and count > max_chunks:
+                    raise SessionQuotaError(f"Session {session_id} would exceed {settings.SESSION_MAX_CHUNKS} chunks")
+                digest = chunk_hash(chunk)
+                if reusable.get(digest):
+                    indexed.setdefault(digest, []).append(reusable[digest].pop())
+                    continue
+                yield digest, chunk
+
+        inserter = threading.Thread(target=insert_worker, name=f"ingest-{session_id}", daemon=True)
+        inserter.start()
+
+        added = 0
+        try:
+            for batch in batched(new_chunks(), settings.INGESTION_BATCH_SIZE):
+                if errors:
+                    break
+                texts = [chunk.page_content for _, chunk in batch]
+                started = time.perf_counter()
+                vectors = embeddings.embed_documents(texts)
+                timings["embed"] = timings.get("embed", 0.0) + time.perf_counter() - started
+                pending.put(([digest for digest, _ in batch], texts, vectors, [chunk.metadata for _, chunk in batch]))
+                added += len(batch)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            pending.put(_DONE)
+            inserter.join()
+
+        if errors:
+            if inserted:
+                try:
+                    vector_store.delete(ids=inserted)
+                    if lexical_index is not None:
+                        lexical_index.remove(inserted)
+                except Exception as e:
+                    logger.error(f"Failed to roll back {len(inserted)} chunks for session {session_id}: {e}")
+            raise errors[0]
+
+        stale_ids = [chunk_id for ids in reusable.values() for chunk_id in ids]
+        if stale_ids:
+            vector_store.delete(ids=stale_ids)
+            if lexical_index is not None:
+                lexical_index.remove(stale_ids)
+        return indexed, added, len(stale_ids)
+
+# Per (session, filename) locks, dropped once nobody holds or awaits them
+_file_locks: Dict[Tuple[str, str], List[Any]] = {}
+
+@asynccontextmanager
+async def _file_lock(session_id: str, filename: str) -> AsyncIterator[None]:
+    key = (session_id, filename)
+    entry = _file_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _file_locks[key]
 
 async def process_file(file: UploadFile, session_id: str) -> int:
+    # The manifest check, ingestion and manifest update run as one step per
+    # file; otherwise two uploads of the same file (even within one request)
+    # both miss the manifest and both embed and insert every chunk
+    async with _file_lock(session_id, file.filename):
+        return await _ingest_file(file, session_id)
+
+async def _ingest_file(file: UploadFile, session_id: str) -> int:
     logger.info(f"Processing file: {file.filename} for session: {session_id}")
     
-    # Save to temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
-
     # Create session directory
     session_dir = os.path.join("backend", "sessions", session_id)
     os.makedirs(session_dir, exist_ok=True)
 
+    # Identical re-uploads are skipped before anything is parsed or embedded
+    content_hash = await asyncio.to_thread(hash_stream, file.file)
+    entry = await asyncio.to_thread(get_file_entry, session_dir, file.filename)
+    if entry and entry["content_hash"] == content_hash:
+        chunks_count = sum(len(ids) for ids in entry["chunks"].values())
+        logger.info(f"{file.filename} is unchanged, skipping re-ingestion ({chunks_count} chunks)")
+        INGESTION_FILES.labels("unchanged").inc()
+        return chunks_count
+
+    await asyncio.to_thread(check_disk_quota, session_id, file.size or 0)
+    max_chunks = settings.SESSION_MAX_CHUNKS - await asyncio.to_thread(session_chunk_count, session_id, file.filename)
+
     try:
-        # Load Document
-        documents = []
-        ext = os.path.splitext(file.filename)[1].lower()
-        
-        if ext == ".pdf":
-            loader = PyMuPDFLoader(tmp_path)
-            documents = loader.load()
-        elif ext == ".md":
-            loader = UnstructuredMarkdownLoader(tmp_path)
-            documents = loader.load()
-        elif ext == ".json":
-            import json
-            with open(tmp_path, 'r') as f:
-                text = json.dumps(json.load(f), indent=2)
-            from langchain_core.documents import Document
-            documents = [Document(page_content=text, metadata={"source": file.filename})]
-        elif ext == ".html":
-            # Save full HTML for RAG
-            html_path = os.path.join(session_dir, file.filename)
-            shutil.copy(tmp_path, html_path)
-            
-            with open(tmp_path, 'r', encoding='utf-8') as f:
-                raw_html = f.read()
-                from langchain_core.documents import Document
-                documents = [Document(
-                    page_content=raw_html, 
-                    metadata={"source": file.filename, "type": "html_source"}
-                )]
-        elif ext == ".txt":
-            from langchain_community.document_loaders import TextLoader
-            loader = TextLoader(tmp_path)
-            documents = loader.load()
-        else:
-            raise ValueError(f"Unsupported file type: {ext}")
-
-        # Add metadata
-        for doc in documents:
-            doc.metadata["source"] = file.filename
-            doc.metadata["session_id"] = session_id
-            if doc.metadata.get("type") == "html_source":
-                doc.metadata["type"] = "html_source"
-            else:
-                doc.metadata["type"] = "document"
-
-        # Split Text
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", " ", ""]
+        # The upload stream feeds the loader directly, no temp copy. Stages
+        # are interleaved, so each one's time is summed over the whole file
+        timings: Dict[str, float] = {}
+        documents = timed_iter(iter_documents(file.file, file.filename, session_dir), timings, "load")
+        chunks = timed_iter(iter_chunks(documents, file.filename, session_id), timings, "split")
+
+        # Ingest into the session's collection (or its slice of the shared one)
+        with pin_session_vector_store(session_id), pin_lexical_index(session_id):
+            lexical_index = await asyncio.to_thread(get_lexical_index, session_id)
+            indexed, added, removed = await asyncio.to_thread(
+                run_ingestion_pipeline, chunks, session_id, entry["chunks"] if entry else None, lexical_index, max_chunks, timings
+            )
+            await asyncio.to_thread(lexical_index.save)
+        # Splitting pulls documents from the loader, so its time includes loading
+        timings["split"] = timings.get("split", 0.0) - timings.get("load", 0.0)
+        for stage in INGESTION_STAGES:
+            INGESTION_STAGE_SECONDS.labels(stage).observe(timings.get(stage, 0.0))
+        await asyncio.to_thread(
+            update_file_entry, session_dir, file.filename, {"content_hash": content_hash, "chunks": indexed}
         )
-        chunks = text_splitter.split_documents(documents)
+        chunks_count = sum(len(ids) for ids in indexed.values())
+        INGESTION_FILES.labels("ingested").inc()
+        INGESTION_FILE_CHUNKS.observe(chunks_count)
+        INGESTION_CHUNKS.labels("embedded").inc(added)
+        INGESTION_CHUNKS.labels("reused").inc(chunks_count - added)
+        INGESTION_CHUNKS.labels("removed").inc(removed)
         
-        if not chunks:
+        if not chunks_count:
             logger.warning(f"No chunks created for {file.filename}")
             return 0
 
-        # Ingest into Milvus with session-specific collection
-        collection_name = f"session_{session_id}"
-        vector_store = get_vector_store(collection_name=collection_name)
-        vector_store.add_documents(chunks)
-        
-        logger.info(f"Successfully ingested {len(chunks)} chunks for {file.filename} into {collection_name}")
-        return len(chunks)
+        logger.info(
+            f"Successfully ingested {chunks_count} chunks for {file.filename} into session {session_id} "
+            f"({added} embedded, {chunks_count - added} reused, {removed} removed)"
+        )
+        return chunks_count
 
     except Exception as e:
         logger.error(f"Error processing {file.filename}: {e}", exc_info=True)
+        INGESTION_FILES.labels("failed").inc()
         raise e
     finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+        # The corpus changed (possibly partially), so cached answers are stale
+        semantic_cache.invalidate(session_id)
+        session_contexts.invalidate(session_id)
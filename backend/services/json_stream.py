@@ -0,0 +1,48 @@
+import json
+from typing import Any, Dict, List
+from backend.core.logging import logger
+
+# Incremental parser for a JSON array of objects arriving in arbitrary pieces,
+# such as an LLM token stream. feed() returns every top-level object that
+# closed within the new text. Anything outside an object (the enclosing
+# brackets, commas, stray markdown fences) is ignored, and an object that
+# fails to parse (e.g. a trailing comma) is logged and skipped.
+class JsonArrayStreamParser:
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        completed = []
+        for char in text:
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = "".join(self._buffer)
+                    self._buffer = []
+                    try:
+                        completed.append(json.loads(raw))
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping malformed JSON object in stream: {e}")
+        return completed
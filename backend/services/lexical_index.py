@@ -0,0 +1,159 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from langchain_core.documents import Document
+from backend.core.config import get_settings
+from backend.core.logging import logger
+from backend.services.session_context import session_dir_for
+
+settings = get_settings()
+
+INDEX_FILE = "lexical_index.json"
+
+# Identifiers such as discount-code, SAVE15 or ERR_CARD_DECLINED stay whole;
+# their parts are indexed too so "discount code" still matches
+_WORD = re.compile(r"[A-Za-z0-9]+(?:[-_.][A-Za-z0-9]+)*")
+_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in _WORD.finditer(text):
+        word = match.group()
+        tokens.append(word.lower())
+        parts = _PART.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+# Okapi BM25 over one session's chunks, keyed by the chunk's vector store id
+# so incremental re-ingestion can add and remove the same chunks in both.
+class LexicalIndex:
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        index = cls(path)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for doc_id, doc in json.load(f)["documents"].items():
+                    index._add(doc_id, doc["text"], doc["metadata"])
+        return index
+
+    def _add(self, doc_id: str, text: str, metadata: dict) -> None:
+        terms = Counter(tokenize(text))
+        self._documents[doc_id] = {"text": text, "metadata": metadata}
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def _remove(self, doc_id: str) -> None:
+        doc = self._documents.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in set(tokenize(doc["text"])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def add(self, ids: Iterable[Any], texts: List[str], metadatas: List[dict]) -> None:
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._remove(str(doc_id))
+                self._add(str(doc_id), text, metadata)
+
+    def remove(self, ids: Iterable[Any]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                self._remove(str(doc_id))
+
+    def search(self, query: str, k: int = 4) -> List[Document]:
+        with self._lock:
+            count = len(self._documents)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [
+                Document(page_content=self._documents[doc_id]["text"], metadata=self._documents[doc_id]["metadata"])
+                for doc_id, _ in ranked
+            ]
+
+    def save(self) -> None:
+        # Serialized under the lock: other uploads keep adding to this index.
+        # Saves run one at a time so they don't share the temp file and a
+        # later snapshot is never overwritten by an earlier one
+        with self._save_lock:
+            with self._lock:
+                data = json.dumps({"documents": self._documents})
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(self.path + ".tmp", self.path)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+# Open indexes are shared between ingestion and retrieval so concurrent
+# uploads to one session update the same object instead of racing on disk.
+# Indexes pinned by an ingestion are never evicted, otherwise the next caller
+# would reload a stale copy and the two would overwrite each other's file.
+_indexes: "OrderedDict[str, LexicalIndex]" = OrderedDict()
+_pins: Dict[str, int] = {}
+_indexes_lock = threading.Lock()
+
+def get_lexical_index(session_id: str) -> LexicalIndex:
+    with _indexes_lock:
+        index = _indexes.get(session_id)
+        if index is not None:
+            _indexes.move_to_end(session_id)
+            return index
+        index = LexicalIndex.load(os.path.join(session_dir_for(session_id), INDEX_FILE))
+        _indexes[session_id] = index
+        excess = len(_indexes) - settings.VECTOR_STORE_CACHE_SIZE
+        for evicted in [name for name in _indexes if name not in _pins][:max(excess, 0)]:
+            del _indexes[evicted]
+            logger.info(f"Evicted lexical index for session {evicted}")
+        return index
+
+@contextmanager
+def pin_lexical_index(session_id: str) -> Iterator[None]:
+    with _indexes_lock:
+        _pins[session_id] = _pins.get(session_id, 0) + 1
+    try:
+        yield
+    finally:
+        with _indexes_lock:
+            _pins[session_id] -= 1
+            if not _pins[session_id]:
+                del _pins[session_id]
+
+def drop_lexical_index(session_id: str) -> Optional[LexicalIndex]:
+    with _indexes_lock:
+        return _indexes.pop(session_id, None)
@@ -0,0 +1,283 @@
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from backend.core.config import get_settings
+from backend.core.logging import logger
+from backend.core.metrics import LLM_REQUEST_SECONDS, LLM_QUEUE_WAIT_SECONDS, LLM_TOKENS
+from backend.services.context_packer import count_tokens
+
+settings = get_settings()
+
+# Lower value is served first
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+class LLMGatewayError(Exception):
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMRateLimitError(LLMGatewayError):
+    status_code = 429
+
+class LLMUnavailableError(LLMGatewayError):
+    status_code = 503
+
+# Classic token bucket refilled continuously; a non-positive rate disables it.
+# The level may go negative when actual usage exceeds the estimate, which
+# simply delays the next request.
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        if self.rate > 0:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+def _create_client():
+    from langchain_groq import ChatGroq
+
+    # Retries are handled by the gateway so they share the rate limiter
+    return ChatGroq(
+        temperature=0,
+        model_name="openai/gpt-oss-20b",
+        api_key=settings.GROQ_API_KEY,
+        max_retries=0
+    )
+
+def _retryable_status(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return status
+    if isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return 503
+    return None
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def _estimate_tokens(prompt: Any) -> int:
+    text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    return count_tokens(text) + settings.LLM_COMPLETION_TOKENS_ESTIMATE
+
+# Single entry point for LLM calls: one shared client (and connection pool),
+# request/token buckets, priority admission and jittered retries.
+class LLMGateway:
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        max_retries: int,
+        queue_timeout: float,
+    ):
+        self.factory = factory
+        self.client = None
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+        self._client_lock = threading.Lock()
+        self._waiters: List[Any] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight = 0
+        # Monotonic deadline before which nothing is admitted (set by provider 429s)
+        self._paused_until = 0.0
+        self._metrics = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failures": 0,
+            "tokens_used": 0,
+            "queue_wait_seconds": 0.0,
+        }
+
+    def get_client(self):
+        with self._client_lock:
+            if self.client is None:
+                self.client = self.factory()
+            return self.client
+
+    def _dispatch(self) -> None:
+        # Admit waiters strictly in priority order while slots and budget allow
+        self._timer = None
+        while self._waiters and self._in_flight < self.max_concurrency:
+            priority, _, estimate, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(
+                self._paused_until - time.monotonic(), self.requests.wait_time(1), self.tokens.wait_time(estimate)
+            )
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.consume(1)
+            self.tokens.consume(estimate)
+            self._in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: int, estimate: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), estimate, future))
+        if self._timer is None:
+            self._dispatch()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Admitted right at the deadline: keep the slot
+            if future.cancel():
+                self._metrics["rate_limited"] += 1
+                raise LLMRateLimitError(
+                    f"LLM queue wait exceeded {self.queue_timeout:.0f}s", retry_after=self.queue_timeout
+                )
+        except asyncio.CancelledError:
+            if not future.cancel():
+                self._release()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self._metrics["queue_wait_seconds"] += waited
+            LLM_QUEUE_WAIT_SECONDS.labels(PRIORITY_NAMES.get(priority, str(priority))).observe(waited)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        if self._timer is None:
+            self._dispatch()
+
+    def _settle_tokens(self, estimate: int, message: Any, endpoint: str) -> None:
+        usage = getattr(message, "usage_metadata", None) or {}
+        used = usage.get("total_tokens", estimate)
+        self.tokens.consume(used - estimate)
+        self._metrics["tokens_used"] += used
+        # Providers that report no usage fall back to local counts
+        prompt_tokens = usage.get("input_tokens", estimate - settings.LLM_COMPLETION_TOKENS_ESTIMATE)
+        completion_tokens = usage.get("output_tokens")
+        if completion_tokens is None:
+            completion_tokens = count_tokens(str(getattr(message, "content", "") or ""))
+        LLM_TOKENS.labels(endpoint, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(endpoint, "completion").inc(completion_tokens)
+
+    async def _backoff(self, attempt: int, error: Exception) -> None:
+        status = _retryable_status(error)
+        if status is None:
+            self._metrics["failures"] += 1
+            raise error
+        # Full jitter, but never earlier than the provider asked for
+        delay = random.uniform(0, min(settings.LLM_RETRY_MAX_SECONDS, settings.LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+        delay = max(delay, _retry_after(error) or 0.0)
+        if status == 429:
+            self._metrics["rate_limited"] += 1
+            # Provider pushed back, so hold admission for every caller until
+            # then, without spending the local budget
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        if attempt >= self.max_retries:
+            self._metrics["failures"] += 1
+            error_type = LLMRateLimitError if status == 429 else LLMUnavailableError
+            raise error_type(f"LLM provider error after {attempt + 1} attempts: {error}", _retry_after(error)) from error
+        self._metrics["retries"] += 1
+        logger.warning(f"LLM call failed with {status}, retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    async def ainvoke(self, prompt: Any, priority: int = INTERACTIVE, endpoint: str = "unknown") -> Any:
+        estimate = _estimate_tokens(prompt)
+        client = self.get_client()
+        for attempt in itertools.count():
+            await self._acquire(priority, estimate)
+            self._metrics["requests"] += 1
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                response = await client.ainvoke(prompt)
+                outcome = "ok"
+            except Exception as e:
+                error = e
+            else:
+                self._settle_tokens(estimate, response, endpoint)
+                return response
+            finally:
+                self._release()
+                LLM_REQUEST_SECONDS.labels(endpoint, outcome).observe(time.perf_counter() - started)
+            await self._backoff(attempt, error)
+
+    async def astream(self, prompt: Any, priority: int = INTERACTIVE, endpoint: str = "unknown") -> AsyncIterator[Any]:
+        estimate = _estimate_tokens(prompt)
+        client = self.get_client()
+        for attempt in itertools.count():
+            await self._acquire(priority, estimate)
+            self._metrics["requests"] += 1
+            received = None
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                async for chunk in client.astream(prompt):
+                    received = chunk if received is None else received + chunk
+                    yield chunk
+                outcome = "ok"
+            except Exception as e:
+                error = e
+            else:
+                self._settle_tokens(estimate, received, endpoint)
+                return
+            finally:
+                self._release()
+                # Includes the time the caller spent consuming each chunk
+                LLM_REQUEST_SECONDS.labels(endpoint, outcome).observe(time.perf_counter() - started)
+            # Chunks already reached the caller, so a retry would duplicate them
+            if received is not None:
+                self._metrics["failures"] += 1
+                raise error
+            await self._backoff(attempt, error)
+
+    def stats(self) -> Dict[str, Any]:
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                queued[PRIORITY_NAMES.get(priority, str(priority))] += 1
+        return {
+            **self._metrics,
+            "queue_depth": queued,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+        }
+
+llm_gateway = LLMGateway(
+    factory=_create_client,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_retries=settings.LLM_MAX_RETRIES,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,305 @@
+import os
+import json
+import uuid
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from backend.core.logging import logger
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Below this many vectors exact search is faster than an HNSW lookup
+HNSW_MIN_VECTORS = 2048
+
+# In-process vector store for small per-session corpora. Vectors live in one
+# contiguous, L2-normalised float32 matrix so a search is a single mat-vec
+# product. The index is persisted next to the session files and reloaded on
+# first use.
+class NumpyVectorStore(VectorStore):
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        persist_dir: Optional[str] = None,
+        use_hnsw: bool = False,
+        flush_delay: float = 0.0,
+    ):
+        self.embedding_function = embedding_function
+        self.persist_dir = persist_dir
+        self.flush_delay = flush_delay
+        self.use_hnsw = use_hnsw and hnswlib is not None
+        if use_hnsw and hnswlib is None:
+            logger.warning("hnswlib is not installed, falling back to exact search")
+
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._hnsw = None
+        # Row indices per metadata value, built lazily for filtered searches
+        self._groups: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+        self._deferred = 0
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def __len__(self) -> int:
+        return self._size
+
+    def exists(self, filter: Optional[Dict[str, Any]] = None) -> bool:
+        if filter:
+            with self._lock:
+                return bool(len(self._rows_matching(filter)))
+        return self._size > 0 or (self.persist_dir is not None and os.path.exists(self.persist_dir))
+
+    # Persistence
+
+    def _paths(self) -> Tuple[str, str]:
+        return os.path.join(self.persist_dir, "vectors.npy"), os.path.join(self.persist_dir, "documents.json")
+
+    def _load(self) -> None:
+        if not self.persist_dir:
+            return
+        vectors_path, documents_path = self._paths()
+        if not (os.path.exists(vectors_path) and os.path.exists(documents_path)):
+            return
+        with open(documents_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        self._ids = stored["ids"]
+        self._texts = stored["texts"]
+        self._metadatas = stored["metadatas"]
+        self._matrix = np.ascontiguousarray(np.load(vectors_path), dtype=np.float32)
+        self._size = len(self._ids)
+        self._groups = {}
+
+    def _persist(self) -> None:
+        if not self.persist_dir:
+            return
+        self._dirty = True
+        if self._deferred:
+            return
+        if self.flush_delay <= 0:
+            self.flush()
+        elif self._flush_timer is None:
+            # Write-behind: a burst of inserts/deletes costs one rewrite
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.start()
+
+    @contextmanager
+    def deferred_writes(self) -> Iterator[None]:
+        # Writes inside the block only mark the index dirty; it is written
+        # once on exit, so an ingestion costs one rewrite instead of one per batch
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._deferred -= 1
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty and self.persist_dir:
+                self._write()
+            self._dirty = False
+
+    def _write(self) -> None:
+        os.makedirs(self.persist_dir, exist_ok=True)
+        vectors_path, documents_path = self._paths()
+        np.save(vectors_path, self._vectors())
+        with open(documents_path, "w", encoding="utf-8") as f:
+            json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}, f)
+
+    # Index maintenance
+
+    def _vectors(self) -> np.ndarray:
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._matrix[:self._size]
+
+    def _append(self, vectors: np.ndarray) -> None:
+        # Grow the backing matrix geometrically so appends stay amortised O(1)
+        needed = self._size + len(vectors)
+        if self._matrix is None:
+            self._matrix = np.empty((max(needed, 64), vectors.shape[1]), dtype=np.float32)
+        elif needed > len(self._matrix):
+            grown = np.empty((max(needed, 2 * len(self._matrix)), self._matrix.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size:needed] = vectors
+        self._size = needed
+        self._hnsw = None
+        self._groups = {}
+
+    def _rows_matching(self, filter: Dict[str, Any]) -> np.ndarray:
+        # Equality filter on metadata; each field is grouped once so a
+        # per-session lookup is a dict hit, like a partition key
+        rows = None
+        for field, value in filter.items():
+            if field not in self._groups:
+                grouped: Dict[Any, List[int]] = {}
+                for i, metadata in enumerate(self._metadatas):
+                    grouped.setdefault(metadata.get(field), []).append(i)
+                self._groups[field] = {key: np.asarray(group) for key, group in grouped.items()}
+            matched = self._groups[field].get(value, np.empty(0, dtype=np.int64))
+            rows = matched if rows is None else np.intersect1d(rows, matched)
+        return rows
+
+    def _build_hnsw(self):
+        vectors = self._vectors()
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=len(vectors), ef_construction=200, M=16)
+        index.add_items(vectors, np.arange(len(vectors)))
+        index.set_ef(64)
+        return index
+
+    @staticmethod
+    def _normalise(vectors: Iterable[List[float]]) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    # VectorStore API
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        if not texts:
+            return []
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        with self._lock:
+            self._append(self._normalise(embeddings))
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(dict(metadata) for metadata in metadatas)
+            self._persist()
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embedding_function.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            if not ids and filter:
+                ids = [self._ids[i] for i in self._rows_matching(filter)]
+            if not ids:
+                return False
+            remove = set(ids)
+            keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in remove]
+            if len(keep) == self._size:
+                return False
+            vectors = self._vectors()[keep]
+            self._ids = [self._ids[i] for i in keep]
+            self._texts = [self._texts[i] for i in keep]
+            self._metadatas = [self._metadatas[i] for i in keep]
+            self._matrix, self._size = None, 0
+            if len(vectors):
+                self._append(vectors)
+            self._hnsw = None
+            self._persist()
+        return True
+
+    def drop(self) -> None:
+        with self._lock:
+            self._ids, self._texts, self._metadatas = [], [], []
+            self._matrix, self._size, self._hnsw = None, 0, None
+            self._groups = {}
+            self._dirty = False
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self.persist_dir and os.path.exists(self.persist_dir):
+                shutil.rmtree(self.persist_dir)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        with self._lock:
+            if self._size == 0:
+                return []
+            query = self._normalise([embedding])[0]
+            k = min(k, self._size)
+
+            if filter:
+                # Exact search over the matching rows only
+                rows = self._rows_matching(filter)
+                if not len(rows):
+                    return []
+                k = min(k, len(rows))
+                scores = self._vectors()[rows] @ query
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                ranked = [(int(rows[i]), float(scores[i])) for i in top]
+            elif self.use_hnsw and self._size >= HNSW_MIN_VECTORS:
+                if self._hnsw is None:
+                    self._hnsw = self._build_hnsw()
+                labels, distances = self._hnsw.knn_query(query, k=k)
+                ranked = [(int(i), 1.0 - float(d)) for i, d in zip(labels[0], distances[0])]
+            else:
+                scores = self._vectors() @ query
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                ranked = [(int(i), float(scores[i])) for i in top]
+
+            return [
+                (Document(id=self._ids[i], page_content=self._texts[i], metadata=dict(self._metadatas[i])), score)
+                for i, score in ranked
+            ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Scores are already cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
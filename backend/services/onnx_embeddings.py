@@ -0,0 +1,73 @@
+import os
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from backend.core.logging import logger
+
+MODEL_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+# CPU embedding backend that runs a sentence-transformers model exported to
+# ONNX (see scripts/export_onnx_model.py) under ONNX Runtime. Reproduces the
+# all-MiniLM-L6-v2 pipeline: mean pooling over the attention mask followed by
+# L2 normalisation.
+class OnnxEmbeddings(Embeddings):
+
+    def __init__(self, model_dir: str, num_threads: int = 0, batch_size: int = 32, max_length: int = 256):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ImportError(
+                "The onnx embedding backend needs `onnxruntime` and `tokenizers`: "
+                "pip install onnxruntime tokenizers"
+            )
+
+        model_path = os.path.join(model_dir, MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX model at {model_path}; run scripts/export_onnx_model.py first"
+            )
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+        logger.info(f"Loaded ONNX embedding model from {model_dir} (threads={num_threads or 'auto'})")
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Batch texts of similar length together to keep padding small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            for index, vector in zip(indices, self._embed_batch([texts[i] for i in indices])):
+                vectors[index] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Iterator, List, Optional
+from langchain_core.documents import Document
+from langchain_core.documents.base import Blob
+from backend.core.config import get_settings
+from backend.core.logging import logger
+
+settings = get_settings()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def pdf_workers() -> int:
+    return settings.PDF_EXTRACTION_WORKERS or os.cpu_count() or 1
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API process runs an event loop and thread
+            # pools whose locks a forked child could inherit mid-use
+            _pool = ProcessPoolExecutor(max_workers=pdf_workers(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def close_pdf_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    # Runs in a worker process; matches PyMuPDFParser's page text
+    import pymupdf
+
+    with pymupdf.open(path) as doc:
+        return [doc[number].get_text().strip() for number in range(start, stop)]
+
+def iter_pdf_pages(stream: BinaryIO, filename: str) -> Iterator[Document]:
+    # One Document per page, in page order. The first page always comes from
+    # PyMuPDFParser on the in-memory upload; its metadata carries the page
+    # count and is reused for every other page. Large PDFs then have the
+    # remaining pages sharded into ranges extracted by a process pool, with a
+    # bounded number of shards in flight and each page yielded as soon as every
+    # earlier page is done, so splitting and embedding keep running meanwhile.
+    from langchain_community.document_loaders.parsers.pdf import PyMuPDFParser
+
+    data = stream.read()
+    pages = PyMuPDFParser().lazy_parse(Blob.from_data(data, path=filename))
+    try:
+        first = next(pages, None)
+        if first is None:
+            return
+        yield first
+        total_pages = first.metadata["total_pages"]
+        workers = pdf_workers()
+        if total_pages < settings.PDF_PARALLEL_MIN_PAGES or workers <= 1:
+            yield from pages
+            return
+    finally:
+        # Releases PyMuPDFParser's lock and the in-memory document
+        pages.close()
+
+    # Workers open the file by path instead of receiving its bytes per shard
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        size = settings.PDF_PAGES_PER_SHARD
+        shards = iter([(start, min(start + size, total_pages)) for start in range(1, total_pages, size)])
+        logger.info(f"Extracting {total_pages} pages of {filename} in {size}-page shards across {workers} processes")
+        pool = get_pdf_pool()
+        pending = deque()
+
+        def submit_next() -> None:
+            shard = next(shards, None)
+            if shard is not None:
+                pending.append((shard[0], pool.submit(extract_page_range, tmp.name, *shard)))
+
+        for _ in range(2 * workers):
+            submit_next()
+        try:
+            while pending:
+                start, future = pending.popleft()
+                texts = future.result()
+                submit_next()
+                for offset, text in enumerate(texts):
+                    yield Document(page_content=text, metadata=first.metadata | {"page": start + offset})
+        except BrokenProcessPool:
+            # A crashed worker poisons the pool; the next file gets a fresh one
+            close_pdf_pool()
+            raise
+        finally:
+            for _, future in pending:
+                future.cancel()
+    finally:
+        os.unlink(tmp.name)
@@ -1,40 +1,54 @@
 import json
-import os
-from typing import List, Dict, Any
-from langchain_groq import ChatGroq
+import time
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from backend.services.ingestion_service import get_vector_store
+from backend.services.vector_store import get_session_vector_store
+from backend.services.embedding_service import embeddings
+from backend.services.semantic_cache import semantic_cache
+from backend.services.json_stream import JsonArrayStreamParser
+from backend.services.session_context import session_contexts
+from backend.services.retrieval import hybrid_search
+from backend.services.context_packer import pack_documents, pack_text
+from backend.services.llm_gateway import llm_gateway, INTERACTIVE, BULK
 from backend.services.prompts import TEST_CASE_GENERATION_PROMPT, SELENIUM_SCRIPT_GENERATION_PROMPT
 from backend.core.config import get_settings
 from backend.core.logging import logger
 
 settings = get_settings()
 
-def get_llm():
-    return ChatGroq(
-        temperature=0,
-        model_name="openai/gpt-oss-20b", 
-        api_key=settings.GROQ_API_KEY
-    )
+async def build_test_case_prompt(query: str, session_id: str):
+    # Opening the store may hit Milvus, so it runs off the event loop
+    vector_store = await asyncio.to_thread(get_session_vector_store, session_id)
+
+    # Exact identifiers (coupon codes, element ids, error keys) come from
+    # the lexical index, paraphrases from the vector store
+    # Twice the final chunk count is retrieved so the packer can trade
+    # redundant neighbours for diverse chunks within the token budget
+    k = settings.TEST_CASE_RETRIEVAL_K
+    context_docs = await hybrid_search(session_id, vector_store, query, 2 * k)
+    return await TEST_CASE_GENERATION_PROMPT.ainvoke({
+        "context": pack_documents(context_docs, settings.TEST_CASE_CONTEXT_TOKENS, max_documents=k),
+        "question": query
+    })
 
 async def generate_test_cases(query: str, session_id: str) -> List[Dict[str, Any]]:
     logger.info(f"Generating test cases for query: {query} in session: {session_id}")
     
-    collection_name = f"session_{session_id}"
-    vector_store = get_vector_store(collection_name=collection_name)
-    retriever = vector_store.as_retriever(search_kwargs={"k": 5})
-    
-    llm = get_llm()
+    # Near-identical queries against an unchanged corpus reuse the last answer
+    if settings.SEMANTIC_CACHE_ENABLED:
+        version = semantic_cache.corpus_version(session_id)
+        query_vector = await embeddings.aembed_query(query)
+        cached = semantic_cache.lookup(session_id, query_vector)
+        if cached is not None:
+            logger.info(f"Semantic cache hit for query: {query} in session: {session_id}")
+            return cached
     
-    chain = (
-        {"context": retriever, "question": RunnablePassthrough()}
-        | TEST_CASE_GENERATION_PROMPT
-        | llm
-    )
+    started = time.perf_counter()
     
     try:
-        response = await chain.ainvoke(query)
+        prompt = await build_test_case_prompt(query, session_id)
+        response = await llm_gateway.ainvoke(prompt, priority=INTERACTIVE, endpoint="generate_test_cases")
         content = response.content
         
         # Basic cleanup if LLM returns markdown code blocks
@@ -50,50 +64,71 @@ async def generate_test_cases(query: str, session_id: str) -> List[Dict[str, Any
             test_cases = [test_cases]
             
         logger.info(f"Generated {len(test_cases)} test cases for session {session_id}")
+        if settings.SEMANTIC_CACHE_ENABLED:
+            semantic_cache.store(session_id, version, query, query_vector, test_cases, time.perf_counter() - started)
         return test_cases
     except Exception as e:
         logger.error(f"Error generating test cases: {e}", exc_info=True)
         raise e
 
-async def generate_selenium_script(test_case: Dict[str, Any], session_id: str) -> str:
-    logger.info(f"Generating script for test case: {test_case.get('test_id')} in session: {session_id}")
+async def stream_test_cases(query: str, session_id: str) -> AsyncIterator[Dict[str, Any]]:
+    logger.info(f"Streaming test cases for query: {query} in session: {session_id}")
     
-    collection_name = f"session_{session_id}"
-    vector_store = get_vector_store(collection_name=collection_name)
+    if settings.SEMANTIC_CACHE_ENABLED:
+        version = semantic_cache.corpus_version(session_id)
+        query_vector = await embeddings.aembed_query(query)
+        cached = semantic_cache.lookup(session_id, query_vector)
+        if cached is not None:
+            logger.info(f"Semantic cache hit for query: {query} in session: {session_id}")
+            for test_case in cached:
+                yield test_case
+            return
     
-    # Try to load full HTML from session storage
-    session_dir = os.path.join("backend", "sessions", session_id)
-    html_context = ""
+    parser = JsonArrayStreamParser()
+    started = time.perf_counter()
+    test_cases = []
     
-    if os.path.exists(session_dir):
-        for filename in os.listdir(session_dir):
-            if filename.lower().endswith(".html"):
-                try:
-                    with open(os.path.join(session_dir, filename), 'r', encoding='utf-8') as f:
-                        html_context += f"\n\n--- FILE: {filename} ---\n{f.read()}"
-                except Exception as e:
-                    logger.error(f"Error reading HTML file {filename}: {e}")
+    try:
+        # Each test case is yielded as soon as its JSON object closes
+        prompt = await build_test_case_prompt(query, session_id)
+        async for chunk in llm_gateway.astream(prompt, priority=INTERACTIVE, endpoint="stream_test_cases"):
+            for test_case in parser.feed(chunk.content):
+                test_cases.append(test_case)
+                yield test_case
+        logger.info(f"Streamed {len(test_cases)} test cases for session {session_id}")
+        if settings.SEMANTIC_CACHE_ENABLED:
+            semantic_cache.store(session_id, version, query, query_vector, test_cases, time.perf_counter() - started)
+    except Exception as e:
+        logger.error(f"Error streaming test cases: {e}", exc_info=True)
+        raise e
+
+async def load_html_context(session_id: str, vector_store) -> str:
+    # HTML (or its DOM index) is served from the in-memory session context,
+    # which stats and possibly reads the session dir, so it runs in a thread
+    html_context = (await asyncio.to_thread(session_contexts.get, session_id)).html_context
 
     # If no HTML found on disk, fallback to vector store (though ingestion should have saved it)
     if not html_context:
         logger.warning("No HTML file found in session storage, falling back to vector search.")
-        html_docs = vector_store.similarity_search("checkout.html HTML structure form inputs buttons", k=3)
+        html_docs = await vector_store.asimilarity_search("checkout.html HTML structure form inputs buttons", k=3)
         html_context = "\n\n".join([doc.page_content for doc in html_docs])
-    
+    return pack_text(html_context, settings.HTML_CONTEXT_TOKENS)
+
+async def _generate_script(
+    test_case: Dict[str, Any], session_id: str, vector_store, html_context: str, priority: int, endpoint: str
+) -> str:
     # Retrieve other relevant docs (specs, guides)
-    doc_docs = vector_store.similarity_search(str(test_case), k=3)
-    doc_context = "\n\n".join([doc.page_content for doc in doc_docs])
-    
-    llm = get_llm()
-    
-    chain = SELENIUM_SCRIPT_GENERATION_PROMPT | llm
+    k = settings.SCRIPT_RETRIEVAL_K
+    doc_docs = await hybrid_search(session_id, vector_store, json.dumps(test_case), 2 * k)
+    doc_context = pack_documents(doc_docs, settings.DOC_CONTEXT_TOKENS, max_documents=k)
     
     try:
-        response = await chain.ainvoke({
+        prompt = await SELENIUM_SCRIPT_GENERATION_PROMPT.ainvoke({
             "test_case": json.dumps(test_case, indent=2),
             "html_context": html_context,
             "doc_context": doc_context
         })
+        response = await llm_gateway.ainvoke(prompt, priority=priority, endpoint=endpoint)
         
         content = response.content
         
@@ -109,3 +144,39 @@ async def generate_selenium_script(test_case: Dict[str, Any], session_id: str) -
     except Exception as e:
         logger.error(f"Error generating script: {e}", exc_info=True)
         raise e
+
+async def generate_selenium_script(test_case: Dict[str, Any], session_id: str) -> str:
+    logger.info(f"Generating script for test case: {test_case.get('test_id')} in session: {session_id}")
+    
+    vector_store = await asyncio.to_thread(get_session_vector_store, session_id)
+    html_context = await load_html_context(session_id, vector_store)
+    
+    return await _generate_script(test_case, session_id, vector_store, html_context, INTERACTIVE, "generate_script")
+
+async def generate_selenium_scripts(
+    test_cases: List[Dict[str, Any]], session_id: str
+) -> AsyncIterator[Tuple[Dict[str, Any], Optional[str], Optional[str]]]:
+    logger.info(f"Generating {len(test_cases)} scripts in session: {session_id}")
+
+    # Shared session context is loaded once for the whole batch
+    vector_store = await asyncio.to_thread(get_session_vector_store, session_id)
+    html_context = await load_html_context(session_id, vector_store)
+    semaphore = asyncio.Semaphore(settings.SCRIPT_GENERATION_CONCURRENCY)
+
+    async def generate(test_case: Dict[str, Any]):
+        async with semaphore:
+            try:
+                # Bulk batches queue behind interactive test-case requests
+                script = await _generate_script(test_case, session_id, vector_store, html_context, BULK, "generate_scripts")
+                return test_case, script, None
+            except Exception as e:
+                return test_case, None, str(e)
+
+    # Yield each script as soon as it finishes, not in request order
+    tasks = [asyncio.create_task(generate(test_case)) for test_case in test_cases]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,44 @@
+import time
+import asyncio
+from typing import Awaitable, Dict, List
+from langchain_core.documents import Document
+from backend.core.config import get_settings
+from backend.core.metrics import RETRIEVAL_SECONDS, RETRIEVAL_DOCUMENTS
+from backend.services.lexical_index import get_lexical_index
+
+settings = get_settings()
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Document]:
+    # Score is the sum of 1 / (k + rank) over every list a chunk appears in;
+    # chunks are matched on their text since ids differ between backends
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            scores[doc.page_content] = scores.get(doc.page_content, 0.0) + 1.0 / (k + rank + 1)
+            documents.setdefault(doc.page_content, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [documents[text] for text in ordered]
+
+async def _timed(source: str, search: Awaitable[List[Document]]) -> List[Document]:
+    started = time.perf_counter()
+    documents = await search
+    RETRIEVAL_SECONDS.labels(source).observe(time.perf_counter() - started)
+    RETRIEVAL_DOCUMENTS.labels(source).observe(len(documents))
+    return documents
+
+async def hybrid_search(session_id: str, vector_store, query: str, k: int) -> List[Document]:
+    if not settings.HYBRID_RETRIEVAL_ENABLED:
+        return await _timed("vector", vector_store.asimilarity_search(query, k=k))
+
+    started = time.perf_counter()
+    candidates = max(k, settings.RETRIEVAL_CANDIDATES)
+    lexical_index = await asyncio.to_thread(get_lexical_index, session_id)
+    semantic, lexical = await asyncio.gather(
+        _timed("vector", vector_store.asimilarity_search(query, k=candidates)),
+        _timed("lexical", asyncio.to_thread(lexical_index.search, query, candidates)),
+    )
+    documents = reciprocal_rank_fusion([semantic, lexical], k=settings.RRF_K)[:k]
+    RETRIEVAL_SECONDS.labels("hybrid").observe(time.perf_counter() - started)
+    RETRIEVAL_DOCUMENTS.labels("hybrid").observe(len(documents))
+    return documents
@@ -0,0 +1,92 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from backend.core.config import get_settings
+
+settings = get_settings()
+
+@dataclass
+class _Entry:
+    vector: np.ndarray
+    query: str
+    result: List[Dict[str, Any]]
+    latency: float
+
+# Per-session cache of generated test cases keyed by query embedding. A lookup
+# hits when a stored query from the same corpus version is at least
+# `threshold` cosine-similar. Ingesting into a session bumps its corpus
+# version, which discards everything cached for it.
+class SemanticCache:
+
+    def __init__(self, threshold: float, max_entries: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[str, List[_Entry]] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.saved_latency = 0.0
+
+    @staticmethod
+    def _normalise(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def corpus_version(self, session_id: str) -> int:
+        with self._lock:
+            return self._versions.get(session_id, 0)
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._versions[session_id] = self._versions.get(session_id, 0) + 1
+            self._entries.pop(session_id, None)
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._versions.pop(session_id, None)
+            self._entries.pop(session_id, None)
+
+    def lookup(self, session_id: str, query_vector: List[float]) -> Optional[List[Dict[str, Any]]]:
+        vector = self._normalise(query_vector)
+        with self._lock:
+            self.lookups += 1
+            best, best_score = None, self.threshold
+            for entry in self._entries.get(session_id, []):
+                score = float(entry.vector @ vector)
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                return None
+            self.hits += 1
+            self.saved_latency += best.latency
+            return best.result
+
+    def store(self, session_id: str, version: int, query: str, query_vector: List[float],
+              result: List[Dict[str, Any]], latency: float) -> None:
+        with self._lock:
+            # Ingestion finished while this generation was running
+            if self._versions.get(session_id, 0) != version:
+                return
+            entries = self._entries.setdefault(session_id, [])
+            entries.append(_Entry(self._normalise(query_vector), query, result, latency))
+            if len(entries) > self.max_entries:
+                entries.pop(0)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "saved_latency_seconds": round(self.saved_latency, 3),
+                "sessions": len(self._entries),
+                "entries": sum(len(entries) for entries in self._entries.values()),
+            }
+
+semantic_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,112 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from backend.core.config import get_settings
+from backend.core.logging import logger
+from backend.services.dom_index import load_dom_index, render_dom_index
+
+settings = get_settings()
+
+@dataclass
+class SessionContext:
+    session_id: str
+    html_context: str
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.html_context)
+
+def session_dir_for(session_id: str) -> str:
+    return os.path.join("backend", "sessions", session_id)
+
+def _read_html_context(session_dir: str, filenames: List[str]) -> str:
+    html_context = ""
+    for filename in filenames:
+        if filename.lower().endswith(".html"):
+            try:
+                dom_index = load_dom_index(session_dir, filename)
+                if dom_index:
+                    html_context += f"\n\n{render_dom_index(dom_index)}"
+                else:
+                    with open(os.path.join(session_dir, filename), 'r', encoding='utf-8') as f:
+                        html_context += f"\n\n--- FILE: {filename} ---\n{f.read()}"
+            except Exception as e:
+                logger.error(f"Error reading HTML file {filename}: {e}")
+    return html_context
+
+# In-memory store of each session's HTML context for script prompts.
+# Hits touch no files: every change to a session directory goes through
+# ingestion or cleanup, which invalidate the entry explicitly. Least recently
+# used sessions are evicted once the total estimated size exceeds max_bytes.
+class SessionContextStore:
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._contexts: "OrderedDict[str, SessionContext]" = OrderedDict()
+        self._size = 0
+        # Bumped by invalidate() so a build that raced with it is not cached
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, session_id: str) -> SessionContext:
+        session_dir = session_dir_for(session_id)
+        filenames = sorted(os.listdir(session_dir)) if os.path.isdir(session_dir) else []
+        return SessionContext(
+            session_id=session_id,
+            html_context=_read_html_context(session_dir, filenames),
+        )
+
+    def get(self, session_id: str) -> SessionContext:
+        with self._lock:
+            context = self._contexts.get(session_id)
+            if context is not None:
+                self._contexts.move_to_end(session_id)
+                self.hits += 1
+                return context
+            self.misses += 1
+            version = self._version
+
+        context = self._build(session_id)
+        with self._lock:
+            if version != self._version:
+                return context
+            self._remove(session_id)
+            self._contexts[session_id] = context
+            self._size += context.size_bytes
+            self._evict()
+        return context
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._version += 1
+            self._remove(session_id)
+
+    def _remove(self, session_id: str) -> None:
+        context = self._contexts.pop(session_id, None)
+        if context is not None:
+            self._size -= context.size_bytes
+
+    def _evict(self) -> None:
+        # Always keep the most recent session even if it alone exceeds the budget
+        while self._size > self.max_bytes and len(self._contexts) > 1:
+            session_id, context = self._contexts.popitem(last=False)
+            self._size -= context.size_bytes
+            logger.info(f"Evicted session context: {session_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "sessions": len(self._contexts),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+session_contexts = SessionContextStore(max_bytes=settings.SESSION_CONTEXT_MAX_BYTES)
@@ -0,0 +1,189 @@
+import os
+import time
+import shutil
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+from backend.core.config import get_settings
+from backend.core.logging import logger
+from backend.services.vector_store import drop_session_vectors, list_session_collections
+from backend.services.semantic_cache import semantic_cache
+from backend.services.session_context import session_contexts, session_dir_for
+from backend.services.ingestion_manifest import load_manifest, forget_session
+from backend.services.lexical_index import drop_lexical_index
+
+settings = get_settings()
+
+class SessionQuotaError(Exception):
+    pass
+
+def session_disk_usage(session_id: str) -> int:
+    total = 0
+    for root, _, files in os.walk(session_dir_for(session_id)):
+        for filename in files:
+            try:
+                total += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return total
+
+def session_chunk_count(session_id: str, exclude: Optional[str] = None) -> int:
+    manifest = load_manifest(session_dir_for(session_id))
+    return sum(
+        len(ids) for filename, entry in manifest.items() if filename != exclude for ids in entry["chunks"].values()
+    )
+
+def check_disk_quota(session_id: str, incoming_bytes: int) -> None:
+    used = session_disk_usage(session_id)
+    if used + incoming_bytes > settings.SESSION_MAX_DISK_BYTES:
+        raise SessionQuotaError(
+            f"Session {session_id} would use {used + incoming_bytes} bytes on disk "
+            f"(limit {settings.SESSION_MAX_DISK_BYTES})"
+        )
+
+# Last-access bookkeeping for every live session. Requests carrying an
+# X-Session-ID mark the session busy while they run so the reaper never pulls
+# a collection out from under an upload or generation.
+class SessionRegistry:
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.reaped = {"ttl": 0, "capacity": 0, "explicit": 0}
+        self.reclaimed_bytes = 0
+        self.reclaimed_chunks = 0
+        self.last_sweep_seconds = 0.0
+        self.last_sweep_at = 0.0
+
+    def acquire(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, {"last_access": time.time(), "in_flight": 0})
+            entry["last_access"] = time.time()
+            entry["in_flight"] += 1
+
+    def release(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry["last_access"] = time.time()
+                entry["in_flight"] = max(0, entry["in_flight"] - 1)
+
+    def discover(self, session_id: str, last_access: float) -> None:
+        # Sessions found on disk or in Milvus after a restart
+        with self._lock:
+            self._sessions.setdefault(session_id, {"last_access": last_access, "in_flight": 0})
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def idle_sessions(self) -> List[tuple]:
+        # (last_access, session_id) for sessions without in-flight requests, oldest first
+        with self._lock:
+            return sorted(
+                (entry["last_access"], session_id)
+                for session_id, entry in self._sessions.items() if entry["in_flight"] == 0
+            )
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            busy = sum(1 for entry in self._sessions.values() if entry["in_flight"])
+        return {
+            "live_sessions": len(self._sessions),
+            "busy_sessions": busy,
+            "max_sessions": settings.MAX_SESSIONS,
+            "reaped_sessions": dict(self.reaped),
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "reclaimed_chunks": self.reclaimed_chunks,
+            "last_sweep_seconds": self.last_sweep_seconds,
+            "last_sweep_at": self.last_sweep_at,
+        }
+
+session_registry = SessionRegistry()
+
+async def cleanup_session(session_id: str, reason: str = "explicit") -> Dict[str, Any]:
+    session_dir = session_dir_for(session_id)
+    reclaimed_chunks = await asyncio.to_thread(session_chunk_count, session_id)
+    reclaimed_bytes = await asyncio.to_thread(session_disk_usage, session_id)
+
+    # 1. Drop the session's vectors (its collection, or its slice of the shared one)
+    dropped = await asyncio.to_thread(drop_session_vectors, session_id)
+    if dropped:
+        logger.info(f"Dropped vectors for session: {session_id}")
+    else:
+        logger.warning(f"No vectors found for session {session_id}, already dropped")
+
+    semantic_cache.drop(session_id)
+    session_contexts.invalidate(session_id)
+    drop_lexical_index(session_id)
+
+    # 2. Delete Session Files
+    if os.path.exists(session_dir):
+        await asyncio.to_thread(shutil.rmtree, session_dir)
+        forget_session(session_dir)
+        logger.info(f"Deleted session directory: {session_dir}")
+
+    session_registry.forget(session_id)
+    session_registry.reaped[reason] = session_registry.reaped.get(reason, 0) + 1
+    session_registry.reclaimed_bytes += reclaimed_bytes
+    session_registry.reclaimed_chunks += reclaimed_chunks
+    return {"collection_dropped": dropped, "reclaimed_bytes": reclaimed_bytes, "reclaimed_chunks": reclaimed_chunks}
+
+def _discover_sessions() -> None:
+    sessions_dir = os.path.join("backend", "sessions")
+    if os.path.isdir(sessions_dir):
+        for name in os.listdir(sessions_dir):
+            path = os.path.join(sessions_dir, name)
+            if os.path.isdir(path):
+                session_registry.discover(name, os.stat(path).st_mtime)
+    try:
+        # Collections without a session dir have no timestamp; their TTL starts now
+        for session_id in list_session_collections():
+            session_registry.discover(session_id, time.time())
+    except Exception as e:
+        logger.warning(f"Could not list session collections: {e}")
+
+async def reap_sessions() -> List[str]:
+    started = time.perf_counter()
+    await asyncio.to_thread(_discover_sessions)
+
+    expired = []
+    now = time.time()
+    idle = session_registry.idle_sessions()
+    for last_access, session_id in idle:
+        if now - last_access > settings.SESSION_TTL_SECONDS:
+            expired.append((session_id, "ttl"))
+
+    # Over the global cap, the least recently used idle sessions go first
+    overflow = len(session_registry) - len(expired) - settings.MAX_SESSIONS
+    ttl_ids = {session_id for session_id, _ in expired}
+    for _, session_id in idle:
+        if overflow <= 0:
+            break
+        if session_id not in ttl_ids:
+            expired.append((session_id, "capacity"))
+            overflow -= 1
+
+    reaped = []
+    for session_id, reason in expired:
+        try:
+            await cleanup_session(session_id, reason)
+            reaped.append(session_id)
+            logger.info(f"Reaped session {session_id} ({reason})")
+        except Exception as e:
+            logger.error(f"Failed to reap session {session_id}: {e}", exc_info=True)
+
+    session_registry.last_sweep_seconds = time.perf_counter() - started
+    session_registry.last_sweep_at = time.time()
+    return reaped
+
+async def run_session_reaper() -> None:
+    logger.info(f"Session reaper started (ttl {settings.SESSION_TTL_SECONDS}s, max {settings.MAX_SESSIONS} sessions)")
+    while True:
+        try:
+            await reap_sessions()
+        except Exception as e:
+            logger.error(f"Session reaper sweep failed: {e}", exc_info=True)
+        await asyncio.sleep(settings.SESSION_REAPER_INTERVAL_SECONDS)
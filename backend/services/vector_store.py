@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from backend.core.config import get_settings
+from backend.core.logging import logger
+from backend.services.embedding_service import embeddings
+from backend.services.numpy_vector_store import NumpyVectorStore
+
+settings = get_settings()
+
+# Process-wide registry of vector store handles. pymilvus shares one connection
+# per URI/token, so caching the wrappers also skips the describe/load round
+# trips every new handle makes. Milvus handles expire after a TTL and the least
+# recently used handle is evicted once the registry is full. In-process numpy
+# stores hold the data itself, so they never expire, and stores pinned by an
+# ingestion are never evicted: a second live copy would lose the other's writes.
+_stores: "OrderedDict[str, Tuple[VectorStore, float]]" = OrderedDict()
+_pins: Dict[str, int] = {}
+_stores_lock = threading.Lock()
+
+def _create_milvus_store(collection_name: str) -> VectorStore:
+    # Imported lazily so the numpy backend runs without pymilvus configured
+    from langchain_milvus import Milvus
+
+    partition_args = {}
+    if collection_name == settings.SHARED_COLLECTION_NAME:
+        # Every session lives in this collection, hashed into partitions by session_id
+        partition_args = {"partition_key_field": "session_id", "num_partitions": settings.MILVUS_NUM_PARTITIONS}
+
+    logger.info(f"Connecting to Milvus collection: {collection_name}")
+    return Milvus(
+        embedding_function=embeddings,
+        connection_args={
+            "uri": settings.MILVUS_URI,
+            "token": settings.MILVUS_TOKEN
+        },
+        collection_name=collection_name,
+        auto_id=True,
+        drop_old=False,
+        # Metadata differs per file type (PDF pages, HTML regions), so it is
+        # stored as dynamic fields rather than a schema fixed by the first insert
+        enable_dynamic_field=True,
+        **partition_args
+    )
+
+def _numpy_index_dir(collection_name: str) -> str:
+    # Session collections persist alongside the session's uploaded files
+    if collection_name.startswith("session_"):
+        session_id = collection_name[len("session_"):]
+        return os.path.join("backend", "sessions", session_id, "vector_index")
+    return os.path.join("backend", "indexes", collection_name)
+
+def _create_numpy_store(collection_name: str) -> VectorStore:
+    logger.info(f"Opening in-process vector index: {collection_name}")
+    return NumpyVectorStore(
+        embedding_function=embeddings,
+        persist_dir=_numpy_index_dir(collection_name),
+        use_hnsw=settings.NUMPY_INDEX_HNSW,
+        # The shared index is rewritten on every insert, so coalesce writes
+        flush_delay=settings.NUMPY_INDEX_FLUSH_SECONDS if collection_name == settings.SHARED_COLLECTION_NAME else 0.0
+    )
+
+_BACKENDS = {
+    "milvus": _create_milvus_store,
+    "numpy": _create_numpy_store,
+}
+
+def _create_vector_store(collection_name: str) -> VectorStore:
+    try:
+        factory = _BACKENDS[settings.VECTOR_BACKEND]
+    except KeyError:
+        raise ValueError(f"Unsupported vector backend: {settings.VECTOR_BACKEND}")
+    return factory(collection_name)
+
+def _is_fresh(entry: Optional[Tuple[VectorStore, float]], now: float) -> bool:
+    if entry is None:
+        return False
+    return isinstance(entry[0], NumpyVectorStore) or now - entry[1] < settings.VECTOR_STORE_CACHE_TTL_SECONDS
+
+def get_vector_store(collection_name: str = "qa_agent_knowledge_base") -> VectorStore:
+    now = time.monotonic()
+    with _stores_lock:
+        entry = _stores.get(collection_name)
+        if _is_fresh(entry, now):
+            _stores.move_to_end(collection_name)
+            return entry[0]
+
+    vector_store = _create_vector_store(collection_name)
+
+    with _stores_lock:
+        # Another request may have created the handle meanwhile; keep the first
+        entry = _stores.get(collection_name)
+        if _is_fresh(entry, now):
+            _stores.move_to_end(collection_name)
+            return entry[0]
+        _stores[collection_name] = (vector_store, now)
+        _stores.move_to_end(collection_name)
+        excess = len(_stores) - settings.VECTOR_STORE_CACHE_SIZE
+        for evicted in [name for name in _stores if name not in _pins][:max(excess, 0)]:
+            evicted_store, _ = _stores.pop(evicted)
+            _close(evicted_store)
+            logger.info(f"Evicted vector store handle: {evicted}")
+    return vector_store
+
+@contextmanager
+def pin_vector_store(collection_name: str) -> Iterator[None]:
+    with _stores_lock:
+        _pins[collection_name] = _pins.get(collection_name, 0) + 1
+    try:
+        yield
+    finally:
+        with _stores_lock:
+            _pins[collection_name] -= 1
+            if not _pins[collection_name]:
+                del _pins[collection_name]
+
+def _close(vector_store: VectorStore) -> None:
+    # Pending write-behind data must reach disk before a new handle reloads it
+    if isinstance(vector_store, NumpyVectorStore):
+        vector_store.flush()
+
+def invalidate_vector_store(collection_name: str) -> None:
+    with _stores_lock:
+        entry = _stores.pop(collection_name, None)
+    if entry is not None:
+        _close(entry[0])
+
+def close_vector_stores() -> None:
+    with _stores_lock:
+        names = list(_stores)
+    for name in names:
+        invalidate_vector_store(name)
+
+def drop_collection(collection_name: str) -> bool:
+    vector_store = get_vector_store(collection_name=collection_name)
+    try:
+        if isinstance(vector_store, NumpyVectorStore):
+            exists = vector_store.exists()
+        else:
+            exists = vector_store.col is not None
+        if exists:
+            vector_store.drop()
+        return exists
+    finally:
+        invalidate_vector_store(collection_name)
+
+# One session's slice of the shared collection. Writes are stamped with the
+# session_id, searches are filtered on it and drop() deletes by filter, so
+# callers can treat it like a per-session collection.
+class SessionVectorStore(VectorStore):
+    def __init__(self, store: VectorStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def embeddings(self):
+        return self.store.embeddings
+
+    def _filter(self) -> dict:
+        if isinstance(self.store, NumpyVectorStore):
+            return {"filter": {"session_id": self.session_id}}
+        return {"expr": f"session_id == {json.dumps(self.session_id)}"}
+
+    def _stamp(self, metadatas: Optional[List[dict]], count: int) -> List[dict]:
+        return [{**(metadata or {}), "session_id": self.session_id} for metadata in (metadatas or [{}] * count)]
+
+    def add_embeddings(self, texts: List[str], embeddings: List[List[float]], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[Any]:
+        return self.store.add_embeddings(texts, embeddings, self._stamp(metadatas, len(texts)), **kwargs)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[Any]:
+        texts = list(texts)
+        return self.store.add_texts(texts, self._stamp(metadatas, len(texts)), **kwargs)
+
+    def delete(self, ids: Optional[List[Any]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        return self.store.delete(ids=ids)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.store.similarity_search(query, k=k, **self._filter())
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return await self.store.asimilarity_search(query, k=k, **self._filter())
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.store.similarity_search_with_score(query, k=k, **self._filter())
+
+    def exists(self) -> bool:
+        if isinstance(self.store, NumpyVectorStore):
+            return self.store.exists(filter={"session_id": self.session_id})
+        return self.store.col is not None and bool(self.store.get_pks(self._filter()["expr"]))
+
+    def drop(self) -> None:
+        if isinstance(self.store, NumpyVectorStore):
+            self.store.delete(filter={"session_id": self.session_id})
+        else:
+            self.store.delete(expr=self._filter()["expr"])
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("SessionVectorStore wraps an existing store")
+
+@contextmanager
+def deferred_writes(vector_store: VectorStore) -> Iterator[None]:
+    # Batches numpy index rewrites over a block; Milvus writes are unaffected
+    store = vector_store.store if isinstance(vector_store, SessionVectorStore) else vector_store
+    if isinstance(store, NumpyVectorStore):
+        with store.deferred_writes():
+            yield
+    else:
+        yield
+
+def _shared_mode() -> bool:
+    if settings.VECTOR_STORAGE_MODE not in ("collection", "shared"):
+        raise ValueError(f"Unsupported vector storage mode: {settings.VECTOR_STORAGE_MODE}")
+    return settings.VECTOR_STORAGE_MODE == "shared"
+
+def _session_collection(session_id: str) -> str:
+    return settings.SHARED_COLLECTION_NAME if _shared_mode() else f"session_{session_id}"
+
+def get_session_vector_store(session_id: str) -> VectorStore:
+    if _shared_mode():
+        return SessionVectorStore(get_vector_store(settings.SHARED_COLLECTION_NAME), session_id)
+    return get_vector_store(collection_name=_session_collection(session_id))
+
+def pin_session_vector_store(session_id: str):
+    return pin_vector_store(_session_collection(session_id))
+
+def drop_session_vectors(session_id: str) -> bool:
+    if not _shared_mode():
+        return drop_collection(f"session_{session_id}")
+    vector_store = get_session_vector_store(session_id)
+    exists = vector_store.exists()
+    if exists:
+        vector_store.drop()
+    return exists
+
+def list_session_collections() -> List[str]:
+    # Session ids that still own vectors, including ones with no session dir.
+    # In shared mode every session has a dir, so the dir scan covers it.
+    if _shared_mode():
+        return []
+    if settings.VECTOR_BACKEND == "numpy":
+        sessions_dir = os.path.join("backend", "sessions")
+        if not os.path.isdir(sessions_dir):
+            return []
+        return [
+            name for name in os.listdir(sessions_dir)
+            if os.path.isdir(_numpy_index_dir(f"session_{name}"))
+        ]
+
+    from pymilvus import MilvusClient
+
+    client = MilvusClient(uri=settings.MILVUS_URI, token=settings.MILVUS_TOKEN)
+    return [name[len("session_"):] for name in client.list_collections() if name.startswith("session_")]
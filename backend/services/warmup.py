@@ -0,0 +1,33 @@
+import time
+import importlib
+from typing import Any, Dict
+from backend.core.logging import logger
+from backend.services.embedding_service import warm_up_embeddings
+
+# Modules that are only imported on first use; importing them during warm-up
+# moves that cost out of the first request.
+DEFERRED_IMPORTS = [
+    "langchain_community.document_loaders.parsers.pdf",
+    "langchain_groq",
+]
+
+_state: Dict[str, Any] = {"ready": False, "error": None, "warmup_seconds": None}
+
+def mark_ready() -> None:
+    _state["ready"] = True
+
+def readiness() -> Dict[str, Any]:
+    return dict(_state)
+
+def warm_up() -> None:
+    started = time.perf_counter()
+    try:
+        for module in DEFERRED_IMPORTS:
+            importlib.import_module(module)
+        warm_up_embeddings()
+        _state["warmup_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Warm-up finished in {_state['warmup_seconds']}s")
+        mark_ready()
+    except Exception as e:
+        _state["error"] = str(e)
+        logger.error(f"Warm-up failed: {e}", exc_info=True)
@@ -0,0 +1,124 @@
+"""Checks that script-generation latency stays flat as concurrent sessions grow.
+
+Milvus and the LLM are replaced by stand-ins with fixed latencies: the vector
+store blocks its calling thread (like the sync Milvus client) and the LLM
+awaits (like an async HTTP client). If a blocking call leaks onto the event
+loop, latency grows linearly with the number of simultaneous sessions.
+
+    python benchmarks/concurrency_benchmark.py --sessions 1 4 16 32
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Any, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
+# The gateway's provider limits are not what is being measured here
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "256")
+
+import httpx
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.vectorstores import VectorStore
+
+class SlowVectorStore(VectorStore):
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        time.sleep(self.latency)
+        return [Document(page_content=f"doc {i} for {query[:20]}") for i in range(k)]
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+class SlowChatModel(BaseChatModel):
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="print('ok')"))])
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="print('ok')"))])
+
+async def run_level(client: httpx.AsyncClient, sessions: int, level: int) -> List[float]:
+    async def one(index: int) -> float:
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/v1/generation/script",
+            json={"test_case": {"test_id": f"TC-{index}", "steps": ["open page"]}},
+            headers={"X-Session-ID": f"bench-{level}-{index}"},
+        )
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(one(i) for i in range(sessions)))
+
+async def run(args) -> dict:
+    from backend.main import app
+    from backend.services import rag_service
+    from backend.services.llm_gateway import llm_gateway
+
+    store = SlowVectorStore(args.store_latency)
+    rag_service.get_session_vector_store = lambda session_id: store
+    llm_gateway.client = SlowChatModel(latency=args.llm_latency)
+    rag_service.embeddings = DeterministicFakeEmbedding(size=384)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for level, sessions in enumerate(args.sessions):
+                latencies = await run_level(client, sessions, level)
+                results.append({
+                    "sessions": sessions,
+                    "mean_seconds": statistics.mean(latencies),
+                    "max_seconds": max(latencies),
+                })
+                print(f"{sessions:>5} sessions: mean {results[-1]['mean_seconds']:.3f}s, max {results[-1]['max_seconds']:.3f}s")
+
+    growth = results[-1]["mean_seconds"] / results[0]["mean_seconds"]
+    return {"levels": results, "growth": growth}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--store-latency", type=float, default=0.1)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--max-growth", type=float, default=2.0,
+                        help="Fail if mean latency at the highest level exceeds this multiple of the lowest")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+    print(f"growth: {summary['growth']:.2f}x (limit {args.max_growth}x)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    if summary["growth"] > args.max_growth:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
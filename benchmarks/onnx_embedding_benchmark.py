@@ -0,0 +1,118 @@
+"""Compares the int8 ONNX embedding backend with HuggingFaceEmbeddings.
+
+Accuracy: per-chunk cosine agreement and top-k retrieval overlap for a fixed
+query set over the Project Assets corpus. Speed: embedded texts per second
+for each backend (and each requested ONNX thread count).
+
+    python scripts/export_onnx_model.py
+    python benchmarks/onnx_embedding_benchmark.py --threads 1 4
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.services.document_loader import iter_documents, iter_chunks
+from backend.services.onnx_embeddings import OnnxEmbeddings
+
+ASSETS_DIR = os.path.join(ROOT, "Project Assets")
+
+QUERIES = [
+    "discount code SAVE15 gives 15 percent off",
+    "FREESHIP coupon shipping cost",
+    "express shipping price",
+    "invalid email error message",
+    "pay now button color and processing state",
+    "name field is required validation",
+    "maximum cart quantity",
+    "coupon validation API endpoint response",
+    "order submit payload required fields",
+    "keyboard focus ring accessibility",
+    "error message role alert aria",
+    "payment successful confirmation message",
+]
+
+def load_corpus():
+    texts = []
+    with tempfile.TemporaryDirectory() as session_dir:
+        for filename in sorted(os.listdir(ASSETS_DIR)):
+            try:
+                with open(os.path.join(ASSETS_DIR, filename), "rb") as f:
+                    documents = iter_documents(f, filename, session_dir)
+                    texts.extend(chunk.page_content for chunk in iter_chunks(documents, filename, "benchmark"))
+            except Exception as e:
+                print(f"Skipping {filename}: {e}", file=sys.stderr)
+    return texts
+
+def normalise(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+def throughput(embeddings, texts, rounds):
+    embeddings.embed_documents(texts[:8])
+    started = time.perf_counter()
+    for _ in range(rounds):
+        embeddings.embed_documents(texts)
+    return rounds * len(texts) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-dir", default=os.path.join(ROOT, "backend", "models", "all-MiniLM-L6-v2-onnx-int8"))
+    parser.add_argument("--threads", type=int, nargs="+", default=[0])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-overlap", type=float, default=0.8)
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    texts = load_corpus()
+    reference = HuggingFaceEmbeddings(model_name=args.model)
+    candidate = OnnxEmbeddings(args.onnx_dir, num_threads=args.threads[0])
+
+    ref_docs = normalise(reference.embed_documents(texts))
+    onnx_docs = normalise(candidate.embed_documents(texts))
+    cosines = (ref_docs * onnx_docs).sum(axis=1)
+
+    ref_queries = normalise([reference.embed_query(q) for q in QUERIES])
+    onnx_queries = normalise([candidate.embed_query(q) for q in QUERIES])
+    k = min(args.k, len(texts))
+    overlaps = []
+    for ref_query, onnx_query in zip(ref_queries, onnx_queries):
+        ref_top = set(np.argsort(-(ref_docs @ ref_query))[:k])
+        onnx_top = set(np.argsort(-(onnx_docs @ onnx_query))[:k])
+        overlaps.append(len(ref_top & onnx_top) / k)
+
+    results = {
+        "chunks": len(texts),
+        "cosine_mean": float(cosines.mean()),
+        "cosine_min": float(cosines.min()),
+        f"top{k}_overlap_mean": float(np.mean(overlaps)),
+        "throughput_texts_per_second": {
+            "huggingface": throughput(reference, texts, args.rounds),
+        },
+    }
+    for threads in args.threads:
+        backend = OnnxEmbeddings(args.onnx_dir, num_threads=threads)
+        results["throughput_texts_per_second"][f"onnx_threads_{threads or 'auto'}"] = throughput(backend, texts, args.rounds)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if results["cosine_min"] < args.min_cosine or results[f"top{k}_overlap_mean"] < args.min_overlap:
+        print("ONNX backend is below the accuracy thresholds", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Compares page-parallel PDF extraction with the serial PyMuPDF loader.
+
+Runs both over one large PDF (generated with --pages, or passed with --pdf)
+and reports time to the first page, total extraction time and pages per
+second, plus extraction followed by chunking to show splitting overlapping
+with extraction. Fails if the parallel pages differ from the serial ones
+in text, order or metadata.
+
+    python benchmarks/pdf_extraction_benchmark.py --pages 800 --workers 2 4
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from langchain_core.documents.base import Blob
+from backend.services import pdf_extractor
+from backend.services.document_loader import iter_chunks
+
+PARAGRAPH = (
+    "REQ-{page}-{n}: When the user applies discount code SAVE15 the order total is reduced by "
+    "fifteen percent before shipping. Express shipping adds a flat fee of ten dollars and the "
+    "cart rejects quantities above ten units with error ERR_QTY_LIMIT shown beneath the field. "
+)
+
+def generate_pdf(path, pages):
+    import pymupdf
+
+    doc = pymupdf.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = "".join(PARAGRAPH.format(page=number, n=n) for n in range(12))
+        page.insert_textbox(page.rect + (50, 50, -50, -50), text, fontsize=9)
+    doc.set_metadata({"title": "Benchmark specification", "author": "pdf_extraction_benchmark"})
+    doc.save(path)
+
+def serial_pages(data, filename):
+    from langchain_community.document_loaders.parsers.pdf import PyMuPDFParser
+    return PyMuPDFParser().lazy_parse(Blob.from_data(data, path=filename))
+
+def parallel_pages(data, filename):
+    return pdf_extractor.iter_pdf_pages(io.BytesIO(data), filename)
+
+def measure(extract, data, filename, repeats):
+    first, total, chunked = [], [], []
+    pages = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        pages = []
+        for document in extract(data, filename):
+            if not pages:
+                first.append(time.perf_counter() - started)
+            pages.append(document)
+        total.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        sum(1 for _ in iter_chunks(extract(data, filename), filename, "benchmark"))
+        chunked.append(time.perf_counter() - started)
+    best = min(total)
+    return pages, {
+        "first_page_seconds": min(first),
+        "total_seconds": best,
+        "pages_per_second": len(pages) / best,
+        "extract_and_split_seconds": min(chunked),
+    }
+
+def same_pages(expected, actual):
+    return len(expected) == len(actual) and all(
+        a.page_content == b.page_content and a.metadata == b.metadata for a, b in zip(expected, actual)
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", help="Benchmark this PDF instead of a generated one")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0])
+    parser.add_argument("--shard-pages", type=int, default=pdf_extractor.settings.PDF_PAGES_PER_SHARD)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = args.pdf
+        if path is None:
+            path = os.path.join(scratch, "specification.pdf")
+            generate_pdf(path, args.pages)
+        with open(path, "rb") as f:
+            data = f.read()
+        filename = os.path.basename(path)
+
+        expected, serial = measure(serial_pages, data, filename, args.repeats)
+        results = {
+            "pages": len(expected),
+            "pdf_bytes": len(data),
+            "cpus": os.cpu_count(),
+            "shard_pages": args.shard_pages,
+            "serial": serial,
+        }
+        mismatched = []
+        # Force the parallel path regardless of PDF_PARALLEL_MIN_PAGES
+        pdf_extractor.settings.PDF_PARALLEL_MIN_PAGES = 0
+        pdf_extractor.settings.PDF_PAGES_PER_SHARD = args.shard_pages
+        for workers in args.workers:
+            pdf_extractor.close_pdf_pool()
+            pdf_extractor.settings.PDF_EXTRACTION_WORKERS = workers
+            effective = pdf_extractor.pdf_workers()
+            if effective <= 1:
+                print(f"Skipping workers={workers}: a single worker uses the serial parser", file=sys.stderr)
+                continue
+            # Spawning the pool is a one-off cost at the first large PDF, not per file
+            sum(1 for _ in parallel_pages(data, filename))
+            pages, parallel = measure(parallel_pages, data, filename, args.repeats)
+            parallel["speedup"] = serial["total_seconds"] / parallel["total_seconds"]
+            results[f"parallel_workers_{effective}"] = parallel
+            if not same_pages(expected, pages):
+                mismatched.append(effective)
+        pdf_extractor.close_pdf_pool()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if mismatched:
+        print(f"Parallel extraction differs from the serial loader for workers={mismatched}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compares collection-per-session and shared-collection storage as sessions grow.
+
+Thousands of sessions ingest, search and clean up concurrently against the
+configured vector backend (Milvus when MILVUS_URI is set, otherwise the numpy
+index in a temporary directory). Embeddings are deterministic fakes, so only
+the storage layer is measured. Every search result is checked for leaks
+from other sessions.
+
+    python benchmarks/session_scaling_benchmark.py --sessions 2000 --modes collection shared
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+if not os.environ.get("MILVUS_URI"):
+    os.environ.setdefault("VECTOR_BACKEND", "numpy")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run_mode(mode: str, args) -> dict:
+    from backend.core.config import get_settings
+    from backend.services import vector_store as vs
+
+    settings = get_settings()
+    settings.VECTOR_STORAGE_MODE = mode
+    vs.close_vector_stores()
+    fake = DeterministicFakeEmbedding(size=args.dim)
+    vs.embeddings = fake
+    semaphore = asyncio.Semaphore(args.concurrency)
+    session_ids = [f"bench{mode[0]}{i:05d}" for i in range(args.sessions)]
+
+    async def ingest(session_id: str):
+        texts = [f"{session_id} chunk {j} checkout discount shipping" for j in range(args.chunks)]
+        metadatas = [{"source": "bench.txt", "session_id": session_id} for _ in texts]
+        async with semaphore:
+            store = await asyncio.to_thread(vs.get_session_vector_store, session_id)
+            await asyncio.to_thread(store.add_embeddings, texts, fake.embed_documents(texts), metadatas)
+
+    async def search(session_id: str):
+        async with semaphore:
+            store = await asyncio.to_thread(vs.get_session_vector_store, session_id)
+            started = time.perf_counter()
+            docs = await store.asimilarity_search(f"{session_id} discount", k=4)
+            elapsed = time.perf_counter() - started
+        return elapsed, sum(1 for doc in docs if doc.metadata.get("session_id") != session_id)
+
+    async def cleanup(session_id: str):
+        async with semaphore:
+            await asyncio.to_thread(vs.drop_session_vectors, session_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(ingest(session_id) for session_id in session_ids))
+    ingest_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(search(session_id) for session_id in session_ids))
+    search_seconds = time.perf_counter() - started
+    latencies = [elapsed for elapsed, _ in results]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(cleanup(session_id) for session_id in session_ids))
+    cleanup_seconds = time.perf_counter() - started
+    vs.close_vector_stores()
+
+    summary = {
+        "mode": mode,
+        "sessions": args.sessions,
+        "chunks_per_session": args.chunks,
+        "ingest_seconds": ingest_seconds,
+        "search_seconds": search_seconds,
+        "search_p50_ms": 1000 * statistics.median(latencies),
+        "search_p95_ms": 1000 * percentile(latencies, 0.95),
+        "cleanup_seconds": cleanup_seconds,
+        "leaked_results": sum(leaks for _, leaks in results),
+    }
+    print(json.dumps(summary))
+    return summary
+
+async def run(args) -> list:
+    return [await run_mode(mode, args) for mode in args.modes]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per session")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--modes", nargs="+", default=["collection", "shared"], choices=["collection", "shared"])
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    # Relative index paths (backend/sessions, backend/indexes) land in a scratch dir
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            results = asyncio.run(run(args))
+        finally:
+            os.chdir(cwd)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if any(result["leaked_results"] for result in results):
+        print("search results leaked across sessions")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
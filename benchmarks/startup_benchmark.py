@@ -0,0 +1,63 @@
+"""Measures backend import time and time until /ready reports ready.
+
+Each trial runs in a fresh interpreter so module caches do not carry over.
+
+    python benchmarks/startup_benchmark.py --trials 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TRIAL = r"""
+import json, time, asyncio
+started = time.perf_counter()
+from backend.main import app
+imported = time.perf_counter() - started
+
+async def run():
+    from backend.services.warmup import readiness
+    async with app.router.lifespan_context(app):
+        while not readiness()["ready"] and not readiness()["error"]:
+            await asyncio.sleep(0.01)
+    return readiness()
+
+state = asyncio.run(run())
+print(json.dumps({
+    "import_seconds": imported,
+    "ready_seconds": time.perf_counter() - started,
+    "error": state["error"],
+}))
+"""
+
+def run_trial() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", TRIAL], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    trials = [run_trial() for _ in range(args.trials)]
+    errors = [trial["error"] for trial in trials if trial["error"]]
+    summary = {
+        "trials": args.trials,
+        "import_seconds_median": statistics.median(t["import_seconds"] for t in trials),
+        "ready_seconds_median": statistics.median(t["ready_seconds"] for t in trials),
+        "errors": errors,
+    }
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "trials": trials}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 import os
+import json
 import uuid
 import streamlit.components.v1 as components
 
@@ -85,6 +86,19 @@ if 'expanded_test_case' not in st.session_state:
 def get_headers():
     return {"X-Session-ID": st.session_state.session_id}
 
+def iter_sse_events(response):
+    # Minimal server-sent events reader: yields (event, data) pairs
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
 def main():
     st.markdown('<h1 class="main-header">🤖 Autonomous QA Agent</h1>', unsafe_allow_html=True)
     st.caption(f"Session ID: {st.session_state.session_id}")
@@ -182,11 +196,29 @@ def render_test_case_agent_page():
                 st.session_state.expanded_test_case = None
                 st.session_state.generating_script_for = None
                 
-                response = requests.post(f"{API_URL}/generation/test-cases", json={"query": query}, headers=get_headers())
+                response = requests.post(
+                    f"{API_URL}/generation/test-cases/stream",
+                    json={"query": query},
+                    headers=get_headers(),
+                    stream=True
+                )
                 if response.status_code == 200:
-                    test_cases = response.json()
-                    st.session_state.generated_test_cases = test_cases
-                    st.success(f"Generated {len(test_cases)} test cases!")
+                    # Show each test case as soon as the backend emits it
+                    progress = st.empty()
+                    received = []
+                    completed = False
+                    for event, data in iter_sse_events(response):
+                        if event == "test_case":
+                            st.session_state.generated_test_cases.append(data)
+                            received.append(f"- **{data.get('test_id', 'N/A')}**: {data.get('test_scenario', 'No Scenario')}")
+                            progress.markdown("\n".join(received))
+                        elif event == "done":
+                            completed = True
+                        elif event == "error":
+                            st.error(f"Error: {data.get('detail')}")
+                    progress.empty()
+                    if completed:
+                        st.success(f"Generated {len(st.session_state.generated_test_cases)} test cases!")
                 else:
                     st.error(f"Error: {response.text}")
             except Exception as e:
@@ -0,0 +1,55 @@
+"""Exports a sentence-transformers model to ONNX and quantizes it to int8.
+
+Writes model.onnx (dynamically quantized, int8 weights) and tokenizer.json to
+the output directory, which is the layout OnnxEmbeddings expects.
+
+    python scripts/export_onnx_model.py --output backend/models/all-MiniLM-L6-v2-onnx-int8
+"""
+import os
+import argparse
+import tempfile
+
+def export(model_name: str, output_dir: str, quantize: bool = True, opset: int = 17) -> None:
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, "tokenizer.json"))
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = os.path.join(tmp, "model_fp32.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+                fp32_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=opset,
+            )
+        target = os.path.join(output_dir, "model.onnx")
+        if quantize:
+            quantize_dynamic(fp32_path, target, weight_type=QuantType.QInt8)
+        else:
+            os.replace(fp32_path, target)
+    print(f"Exported {model_name} to {output_dir} ({'int8' if quantize else 'fp32'})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--output", default=os.path.join("backend", "models", "all-MiniLM-L6-v2-onnx-int8"))
+    parser.add_argument("--no-quantize", action="store_true", help="Keep fp32 weights")
+    args = parser.parse_args()
+    export(args.model, args.output, quantize=not args.no_quantize)
+
+if __name__ == "__main__":
+    main()